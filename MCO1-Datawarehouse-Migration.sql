@@ -0,0 +1,35 @@
+-- One-time migration for warehouses created from an older MCO1-Datawarehouse-Schema.sql.
+-- Safe to re-run: every statement is IF NOT EXISTS.
+SET search_path TO dw_books_movies;
+
+-- ----------------------------
+-- Natural keys for the loaders' ON CONFLICT upserts
+-- ----------------------------
+ALTER TABLE Dim_Movie ADD COLUMN IF NOT EXISTS Movie_ID_Source VARCHAR(100);
+
+CREATE UNIQUE INDEX IF NOT EXISTS dim_book_book_id_source_key ON Dim_Book (Book_ID_Source);
+CREATE UNIQUE INDEX IF NOT EXISTS dim_movie_movie_id_source_key ON Dim_Movie (Movie_ID_Source);
+CREATE UNIQUE INDEX IF NOT EXISTS dim_actor_actor_id_source_key ON Dim_Actor (Actor_ID_Source);
+
+-- ----------------------------
+-- Box office title + year lookups
+-- ----------------------------
+CREATE INDEX IF NOT EXISTS idx_dim_movie_title_year ON Dim_Movie (Movie_Title_Source, Release_Year);
+
+-- ----------------------------
+-- Cache Table: Tmdb_Actor_Cache
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS Tmdb_Actor_Cache (
+    Actor_ID_Source VARCHAR(100) PRIMARY KEY,
+    Tmdb_ID INT,
+    Popularity DECIMAL(10, 2),
+    Fetched_At TIMESTAMPTZ NOT NULL
+);
+
+-- ----------------------------
+-- Cache Table: Tmdb_Movie_Cache
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS Tmdb_Movie_Cache (
+    Movie_ID_Source VARCHAR(100) PRIMARY KEY,
+    Fetched_At TIMESTAMPTZ NOT NULL
+);
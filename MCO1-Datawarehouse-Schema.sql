@@ -28,7 +28,8 @@ CREATE TABLE Dim_Book (
     Publication_Date DATE,
     Language_Code CHAR(3),
     Num_Pages INT,
-    PRIMARY KEY (Book_SK)
+    PRIMARY KEY (Book_SK),
+    UNIQUE (Book_ID_Source) -- natural key, ON CONFLICT target of the loaders' upserts
 );
 
 -- ----------------------------
@@ -36,15 +37,20 @@ CREATE TABLE Dim_Book (
 -- ----------------------------
 CREATE TABLE Dim_Movie (
     Movie_SK INT NOT NULL GENERATED BY DEFAULT AS IDENTITY,
+    Movie_ID_Source VARCHAR(100), -- IMDb id digits (bfr upsert key, TMDb lookups)
     Movie_Title_Source VARCHAR(500) NOT NULL,
     Release_Date DATE,
     Release_Year INT,
     Distributor VARCHAR(255),
     Genre VARCHAR(100),
     Director VARCHAR(255),
-    PRIMARY KEY (Movie_SK)
+    PRIMARY KEY (Movie_SK),
+    UNIQUE (Movie_ID_Source) -- natural key, ON CONFLICT target of the loaders' upserts
 );
 
+-- box office rows are matched to movies by title + year
+CREATE INDEX IF NOT EXISTS idx_dim_movie_title_year ON Dim_Movie (Movie_Title_Source, Release_Year);
+
 -- ----------------------------
 -- Dimension Table: Dim_Actor
 -- ----------------------------
@@ -55,7 +61,8 @@ CREATE TABLE Dim_Actor (
     Birth_Year INT,
     Primary_Profession VARCHAR(255),
     Popularity_Score DECIMAL(10, 2),
-    PRIMARY KEY (Actor_SK)
+    PRIMARY KEY (Actor_SK),
+    UNIQUE (Actor_ID_Source) -- natural key, ON CONFLICT target of the loaders' upserts
 );
 
 -- ----------------------------
@@ -96,6 +103,26 @@ CREATE TABLE Bridge_Movie_Actor (
     FOREIGN KEY (Actor_SK) REFERENCES Dim_Actor(Actor_SK)
 );
 
+-- ----------------------------
+-- Cache Table: Tmdb_Actor_Cache
+-- ----------------------------
+-- actors already resolved on TMDb, so re-runs of the popularity load skip them
+CREATE TABLE IF NOT EXISTS Tmdb_Actor_Cache (
+    Actor_ID_Source VARCHAR(100) PRIMARY KEY,
+    Tmdb_ID INT,
+    Popularity DECIMAL(10, 2),
+    Fetched_At TIMESTAMPTZ NOT NULL
+);
+
+-- ----------------------------
+-- Cache Table: Tmdb_Movie_Cache
+-- ----------------------------
+-- movies already asked for on TMDb (found or not), so re-runs of the movie load skip them
+CREATE TABLE IF NOT EXISTS Tmdb_Movie_Cache (
+    Movie_ID_Source VARCHAR(100) PRIMARY KEY,
+    Fetched_At TIMESTAMPTZ NOT NULL
+);
+
 
 
 
@@ -0,0 +1,102 @@
+import pandas as pd
+import numpy as np
+import re, io
+from sqlalchemy import text
+from datetime import date
+
+# helpers shared by every loader -- one copy here instead of one per file
+
+DW_SCHEMA = "dw_books_movies" #our star schema where the data will be loaded
+
+_IMDB_RE = re.compile(r"tt?(\d+)")
+_YEAR_RE = re.compile(r"(\d{4})")
+_CURRENCY_RE = re.compile(r"[$,]")
+_PG_INT_MAX = 2147483647 #upper bound of a postgres INT column
+
+# every load can simply be re-run after a crash, so its transactions don't wait on the WAL flush at commit
+_ASYNC_COMMIT_SQL = text("SET LOCAL synchronous_commit = OFF")
+
+#date
+def _date_to_sk(d: date) -> int:
+    # YYYYMMDD as int
+    return d.year * 10000 + d.month * 100 + d.day
+
+# column-at-a-time versions of the helpers above
+
+def _imdb_key_series(s: pd.Series) -> pd.Series:
+    #movie natural key from IMDb so we can upsert easily, for a whole column at once
+    return s.astype("string").str.extract(_IMDB_RE, expand=False)
+
+def _coalesce(df: pd.DataFrame, *cols) -> pd.Series:
+    # column version of r.get(a) or r.get(b): first non-empty value across the columns that exist
+    out = pd.Series(None, index=df.index, dtype="object")
+    for col in cols:
+        if col in df.columns:
+            # where() instead of fillna(): no object-dtype downcasting (and its FutureWarning)
+            out = out.where(out.notna(), df[col].mask(df[col] == ""))
+    return out
+
+def _coerce_date_series(s: pd.Series) -> pd.Series:
+    # the same date strings repeat a lot (release days, bare years), so only the
+    # distinct values get parsed and the results are broadcast back by position
+    codes, uniques = pd.factorize(s)
+    parsed = _parse_dates(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    # factorize marks missing values with -1, which picks the trailing None
+    return pd.Series(np.append(parsed, None)[codes], index=s.index, dtype=object)
+
+def _parse_dates(s: pd.Series) -> pd.Series:
+    # bare years (1800-2100) become Jan 1, everything else goes through one to_datetime pass,
+    # and anything still unparsed falls back to the first 4-digit year in the text
+    num = pd.to_numeric(s, errors="coerce")
+    year = num.where((num > 1800) & (num < 2100))
+    parsed = pd.to_datetime(s.where(year.isna()).astype("string"), errors="coerce", format="mixed")
+    text_year = pd.to_numeric(s.astype("string").str.extract(_YEAR_RE, expand=False), errors="coerce")
+    year = year.fillna(text_year.where(parsed.isna()))
+    from_year = pd.to_datetime((year // 1).astype("Int64").astype("string") + "-01-01", errors="coerce")
+    dates = parsed.fillna(from_year)
+    return dates.dt.date.where(dates.notna(), None)
+
+def _safe_float_series(s: pd.Series, lo=None, hi=None) -> pd.Series:
+    # rating coercion for a whole column: non-numeric or out-of-range values become NaN
+    f = pd.to_numeric(s, errors="coerce")
+    if lo is not None: f = f.where(f >= lo)
+    if hi is not None: f = f.where(f <= hi)
+    return f
+
+def _safe_int_series(s: pd.Series, lo=None, hi=None) -> pd.Series:
+    # int(float(v)) for a whole column, NA where it doesn't parse or falls outside [lo, hi]
+    return np.trunc(_safe_float_series(s, lo, hi)).astype("Int64")
+
+def _clean_currency_series(s: pd.Series) -> pd.Series:
+    # currency strings -> float for a whole column: strip $ and , in one regex pass, NaN where it doesn't parse
+    return pd.to_numeric(s.astype("string").str.replace(_CURRENCY_RE, "", regex=True), errors="coerce")
+
+def _copy_df(c, df: pd.DataFrame, table: str):
+    # stream a DataFrame into a temp table with COPY (same format as the imdb actor loader)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, sep='\t', na_rep='\\N')
+    buffer.seek(0)
+    with c.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t', NULL '\\N')",
+            buffer
+        )
+
+def _drop_secondary_indexes(c, table: str) -> list[str]:
+    # only plain secondary indexes -- the pkey and unique ones back the ON CONFLICT upserts
+    # runs in the caller's transaction, so a rollback brings the indexes back too
+    rows = c.execute(text("""
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = :schema AND tablename = :table
+          AND indexdef NOT LIKE 'CREATE UNIQUE%'
+    """), {"schema": DW_SCHEMA, "table": table}).fetchall()
+    for name, _ in rows:
+        c.execute(text(f'DROP INDEX IF EXISTS {DW_SCHEMA}."{name}"'))
+    return [indexdef for _, indexdef in rows]
+
+def _recreate_indexes(c, index_defs: list[str]):
+    # one sorted btree build per index instead of maintaining it row by row during the load
+    # more sort memory for the rebuild, for the rest of the caller's transaction only
+    c.execute(text("SET LOCAL maintenance_work_mem = '1GB'"))
+    for indexdef in index_defs:
+        c.execute(text(indexdef))
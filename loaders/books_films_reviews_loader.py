@@ -1,160 +1,357 @@
 import pandas as pd
-import sqlite3, os, re
+import sqlite3, os
 from sqlalchemy import create_engine, text
-from datetime import datetime, date
+from loaders._common import (DW_SCHEMA, _ASYNC_COMMIT_SQL, _date_to_sk, _imdb_key_series, _coalesce,
+                             _coerce_date_series, _safe_float_series, _safe_int_series, _copy_df,
+                             _drop_secondary_indexes, _recreate_indexes)
 from config import PG_URL, BOOKS_FILM_REVIEW_PATH
 
-DW_SCHEMA = "dw_books_movies" #our star schema where the data will be loaded
+READ_CHUNK_SIZE = 100_000 #rows per DataFrame when streaming big SQLite tables
 
-def _derive_movie_id_source_from_imdb(imdb_id: str | None) -> str | None:
-    #movie natural key from IMDb so we can upsert easily
-    if not imdb_id or not isinstance(imdb_id, str):
-        return None
-    m = re.search(r"tt?(\d+)", imdb_id.strip())
-    return m.group(1) if m else None
+def _source_id_series(s: pd.Series) -> pd.Series:
+    # numeric ids as "123" (not "123.0"), string ids stripped
+    return _safe_int_series(s).astype("string").fillna(s.astype("string").str.strip())
+
+def _none_na(s: pd.Series) -> pd.Series:
+    # NaN/NA -> None so the per-row dicts keep plain truthiness checks
+    return s.astype(object).where(s.notna(), None)
+
+def _as_arrays(rows, keys):
+    # list of row dicts -> {key: [values]} for unnest(CAST(:key AS type[]), ...)
+    return {k: [r[k] for r in rows] for k in keys}
 
-def _coerce_date(val) -> date | None:
-    if val is None:
+def _table_columns(src, table: str) -> dict:
+    # lower-cased column name -> actual column name ({} when the table doesn't exist)
+    info = src.execute(f"PRAGMA table_info({table})").fetchall()
+    return {row[1].strip().lower(): row[1] for row in info}
+
+def _try_read(src, table: str, columns, filters: dict | None = None, **kwargs):
+    # SELECT only the wanted columns that exist in the table (lower-cased), or None when it doesn't exist.
+    # filters ({column: allowed values}) are pushed into the WHERE so rejected rows never reach pandas
+    have = _table_columns(src, table)
+    if not have:
         return None
-    try:
-        if isinstance(val, (int, float)) and 1800 < val < 2100:
-            return date(int(val), 1, 1)
-        
-        dt = pd.to_datetime(val, errors="coerce")
-        if pd.isna(dt):
-            m = re.search(r"(\d{4})", str(val))
-            if m:
-                return date(int(m.group(1)), 1, 1)
-            return None
-        return dt.date()
-    except Exception:
+    cols = [c for c in columns if c in have]
+    if not cols:
         return None
-
-#date
-def _date_to_sk(d: date) -> int:
-    # YYYYMMDD as int
-    return d.year * 10000 + d.month * 100 + d.day
-
-def _safe_float(v, lo=None, hi=None):
-    try:
-        f = float(v)
-        if lo is not None and f < lo: return None
-        if hi is not None and f > hi: return None
-        return f
-    except Exception:
+    select = ", ".join(f'"{have[c]}" AS {c}' for c in cols)
+    sql = f"SELECT {select} FROM {table}"
+    filters = {c: v for c, v in (filters or {}).items() if c in have}
+    if filters:
+        sql += " WHERE " + " AND ".join(f'"{have[c]}" IN ({", ".join("?" * len(v))})' for c, v in filters.items())
+        kwargs["params"] = [x for v in filters.values() for x in v]
+    return pd.read_sql_query(sql, src, **kwargs)
+
+def _read_fields(src, table: str, fields: dict, **kwargs):
+    # like _try_read, but the projection + coalescing happens in the SELECT so the
+    # DataFrame arrives already shaped: one column per field, NULL when no source column exists
+    have = _table_columns(src, table)
+    if not any(c in have for cols in fields.values() for c in cols):
         return None
-    
-def _safe_int(v):
-        try:
-            return int(float(v)) 
-        except Exception:
-            return None 
+    select = []
+    for out, cols in fields.items():
+        found = [f"NULLIF(\"{have[c]}\", '')" for c in cols if c in have]
+        if not found:
+            expr = "NULL"
+        elif len(found) == 1:
+            expr = found[0]
+        else:
+            expr = f"COALESCE({', '.join(found)})"
+        select.append(f"{expr} AS {out}")
+    return pd.read_sql_query(f"SELECT {', '.join(select)} FROM {table}", src, **kwargs)
+
+# source columns the loader actually uses, per SQLite table
+# output column -> source columns, first non-empty wins (COALESCE'd inside SQLite)
+_BOOK_FIELDS = {
+    "src": ["goodreads_book_id", "book_id"],
+    "title": ["title"],
+    "authors": ["author", "authors"],
+    "isbn": ["isbn"],
+    "pub_date": ["publication_date", "year"],
+    "language_code": ["language_code"],
+    "num_pages": ["length", "num_pages"],
+    "avg_rating": ["avg_rating", "average_rating"],
+    "ratings_count": ["rating_count", "ratings_count"],
+    "text_reviews_count": ["review_count", "work_text_reviews_count", "text_reviews_count"],
+}
+_MOVIE_COLS = ["imdbid", "imdb_id", "tmdbid", "tmdb_id", "title", "original_title", "full_name",
+               "release_date", "year", "averagerating", "rating_average", "vote_average",
+               "numvotes", "vote_count", "distributor", "budget", "revenue"]
+_GENRE_COLS = ["imdbid", "genre"]
+_PEOPLE_COLS = ["tconst", "imdbid", "nconst", "person_id", "primaryname", "name",
+                "category", "role", "characters"]
+_LINK_COLS = ["goodreads_book_id", "book_id", "id_goodreads",
+              "imdb_id", "movie_imdb_id", "imdb", "ttid", "imdbid",
+              "tmdb_id", "movie_tmdb_id", "tmdb", "tmdbid"]
+
+# statements are built once at import and reused on every run
+_SET_SEARCH_PATH_SQL = text(f"SET search_path TO {DW_SCHEMA}")
+
+_TEMP_DIM_BOOK_SQL = text("""
+    CREATE TEMPORARY TABLE temp_dim_book (
+        src TEXT, isbn TEXT, title TEXT, author TEXT,
+        pub_date DATE, lang TEXT, pages INT
+    ) ON COMMIT DROP;
+""")
+
+_DIM_BOOK_UPSERT_SQL = text("""
+    INSERT INTO Dim_Book
+        (Book_ID_Source, ISBN, Title, Author, Publisher, Publication_Date, Language_Code, Num_Pages)
+    SELECT src, isbn, title, author, NULL, pub_date, lang, pages
+    FROM temp_dim_book
+    ON CONFLICT (Book_ID_Source) DO UPDATE SET
+        ISBN = EXCLUDED.ISBN,
+        Title = EXCLUDED.Title,
+        Author = EXCLUDED.Author,
+        Publication_Date = EXCLUDED.Publication_Date,
+        Language_Code = EXCLUDED.Language_Code,
+        Num_Pages = EXCLUDED.Num_Pages
+    WHERE (Dim_Book.ISBN, Dim_Book.Title, Dim_Book.Author, Dim_Book.Publication_Date,
+           Dim_Book.Language_Code, Dim_Book.Num_Pages)
+          IS DISTINCT FROM
+          (EXCLUDED.ISBN, EXCLUDED.Title, EXCLUDED.Author, EXCLUDED.Publication_Date,
+           EXCLUDED.Language_Code, EXCLUDED.Num_Pages)
+""")
+
+# unchanged rows are skipped by the upsert (so RETURNING would miss them): SKs come from a join
+_DIM_BOOK_SK_SQL = text("""
+    SELECT d.Book_ID_Source, d.Book_SK
+    FROM Dim_Book d
+    JOIN temp_dim_book t ON d.Book_ID_Source = t.src
+""")
+
+_TEMP_DIM_MOVIE_SQL = text("""
+    CREATE TEMPORARY TABLE temp_dim_movie (
+        src TEXT, title TEXT, rdate DATE, ryear INT,
+        dist TEXT, genre TEXT, director TEXT
+    ) ON COMMIT DROP;
+""")
+
+_DIM_MOVIE_UPSERT_SQL = text("""
+    INSERT INTO Dim_Movie
+        (Movie_ID_Source, Movie_Title_Source, Release_Date, Release_Year, Distributor, Genre, Director)
+    SELECT src, title, rdate, ryear, dist, genre, director
+    FROM temp_dim_movie
+    ON CONFLICT (Movie_ID_Source) DO UPDATE SET
+        Movie_Title_Source = EXCLUDED.Movie_Title_Source,
+        Release_Date       = EXCLUDED.Release_Date,
+        Release_Year       = EXCLUDED.Release_Year,
+        Distributor        = EXCLUDED.Distributor,
+        Genre              = EXCLUDED.Genre,
+        Director           = EXCLUDED.Director
+    WHERE (Dim_Movie.Movie_Title_Source, Dim_Movie.Release_Date, Dim_Movie.Release_Year,
+           Dim_Movie.Distributor, Dim_Movie.Genre, Dim_Movie.Director)
+          IS DISTINCT FROM
+          (EXCLUDED.Movie_Title_Source, EXCLUDED.Release_Date, EXCLUDED.Release_Year,
+           EXCLUDED.Distributor, EXCLUDED.Genre, EXCLUDED.Director)
+""")
+
+_DIM_MOVIE_SK_SQL = text("""
+    SELECT d.Movie_ID_Source, d.Movie_SK
+    FROM Dim_Movie d
+    JOIN temp_dim_movie t ON d.Movie_ID_Source = t.src
+""")
+
+_DIM_DATE_INSERT_SQL = text("""
+    INSERT INTO Dim_Date (Date_SK, Full_Date, Year, Month, Month_Name, Quarter, Day_of_Week)
+    SELECT u.sk, u.d, EXTRACT(YEAR FROM u.d)::INT, EXTRACT(MONTH FROM u.d)::INT,
+           TO_CHAR(u.d, 'Month'), CONCAT('Q', EXTRACT(QUARTER FROM u.d)::INT),
+           TO_CHAR(u.d, 'Day')
+    FROM unnest(CAST(:sk AS int[]), CAST(:d AS date[])) AS u(sk, d)
+    ON CONFLICT (Date_SK) DO NOTHING
+""")
+
+_TEMP_DIM_ACTOR_SQL = text("""
+    CREATE TEMPORARY TABLE temp_dim_actor (
+        src_id TEXT, name TEXT
+    ) ON COMMIT DROP;
+""")
+
+_DIM_ACTOR_UPSERT_SQL = text("""
+    INSERT INTO Dim_Actor (Actor_ID_Source, Name)
+    SELECT src_id, name
+    FROM temp_dim_actor
+    ON CONFLICT (Actor_ID_Source) DO UPDATE SET
+        Name = EXCLUDED.Name
+    WHERE Dim_Actor.Name IS DISTINCT FROM EXCLUDED.Name
+""")
+
+_TEMP_BRIDGE_SQL = text("""
+    CREATE TEMPORARY TABLE temp_bridge (
+        movie_src TEXT, actor_src TEXT, role TEXT
+    ) ON COMMIT DROP;
+""")
+
+# the PKs are the only indexes on the bridge/fact tables and ON CONFLICT needs them, so
+# they stay; rows go in PK order instead so the btree is appended to, not split at random
+_BRIDGE_INSERT_SQL = text("""
+    INSERT INTO Bridge_Movie_Actor (Movie_SK, Actor_SK, Role)
+    SELECT m.Movie_SK, a.Actor_SK, u.role
+    FROM temp_bridge u
+    JOIN Dim_Movie m ON m.Movie_ID_Source = u.movie_src
+    JOIN Dim_Actor a ON a.Actor_ID_Source = u.actor_src
+    ORDER BY m.Movie_SK, a.Actor_SK
+    ON CONFLICT (Movie_SK, Actor_SK) DO NOTHING
+""")
+
+_TEMP_FACT_SQL = text("""
+    CREATE TEMPORARY TABLE temp_fact_book_adaptation (
+        bsk INT, msk INT, dsk INT,
+        revenue NUMERIC, budget NUMERIC,
+        bavg NUMERIC, brc INT, btrc INT,
+        mavg NUMERIC, mrc INT
+    ) ON COMMIT DROP;
+""")
+
+_FACT_INSERT_SQL = text("""
+    INSERT INTO Fact_Book_Adaptation
+        (Book_SK, Movie_SK, Movie_Release_Date_SK,
+         Box_Office_Gross, Tickets_Sold, Production_Budget, Profit, ROI,
+         Book_Average_Rating, Book_Ratings_Count, Book_Text_Reviews_Count,
+         Movie_Average_Rating, Movie_Review_Count)
+    SELECT bsk, msk, dsk,
+           revenue, NULL, budget,
+           revenue - budget,
+           -- junk budgets (1, 10, ...) give ROIs that don't fit DECIMAL(10,2) -> NULL, not an error
+           CASE WHEN ABS((revenue - budget) / NULLIF(budget, 0) * 100) < 99999999.99
+                THEN (revenue - budget) / NULLIF(budget, 0) * 100 END,
+           bavg, brc, btrc,
+           mavg, mrc
+    FROM temp_fact_book_adaptation
+    ORDER BY bsk, msk
+    ON CONFLICT (Book_SK, Movie_SK) DO NOTHING
+""")
+
+# fresh planner stats after the bulk load (autovacuum may not have caught up yet)
+_ANALYZE_SQL = text("""
+    ANALYZE Dim_Date, Dim_Book, Dim_Movie, Dim_Actor, Bridge_Movie_Actor, Fact_Book_Adaptation
+""")
+
+def _load_book_dim(c, book_df):
+    # COPY into a temp table, then one upsert; SKs are read back by joining on the temp table
+    c.execute(_TEMP_DIM_BOOK_SQL)
+    _copy_df(c, book_df, "temp_dim_book")
+    c.execute(_DIM_BOOK_UPSERT_SQL)
+    return dict(c.execute(_DIM_BOOK_SK_SQL).fetchall())
+
+def _load_movie_dim(c, movie_df):
+    # Dim_Movie: same COPY + upsert + SK join as books
+    c.execute(_TEMP_DIM_MOVIE_SQL)
+    _copy_df(c, movie_df, "temp_dim_movie")
+    c.execute(_DIM_MOVIE_UPSERT_SQL)
+    return dict(c.execute(_DIM_MOVIE_SK_SQL).fetchall())
+
+def _load_actor_dim(c, actor_df):
+    # Dim_Actor: no SKs needed back, the bridge resolves them with a join
+    c.execute(_TEMP_DIM_ACTOR_SQL)
+    _copy_df(c, actor_df, "temp_dim_actor")
+    return c.execute(_DIM_ACTOR_UPSERT_SQL).rowcount
 
 #load the data from the source
-def load_dw_from_bfr():
+def load_dw_from_bfr(rebuild_indexes: bool = False):
     if not BOOKS_FILM_REVIEW_PATH or not os.path.exists(BOOKS_FILM_REVIEW_PATH):
         print(f"books_films_reviews not found: {BOOKS_FILM_REVIEW_PATH}")
         return
 
     pg = create_engine(PG_URL)
     src = sqlite3.connect(BOOKS_FILM_REVIEW_PATH)
-
-    tables = pd.read_sql_query(
-        "SELECT name FROM sqlite_master WHERE type='table'", src
-    )["name"].str.lower().tolist()
-    print("SQLite tables:", ", ".join(sorted(tables)))
+    # read-only source: bigger page cache, memory-mapped reads, temp b-trees in RAM
+    src.executescript(
+        "PRAGMA cache_size=-200000; PRAGMA temp_store=MEMORY; "
+        "PRAGMA mmap_size=268435456; PRAGMA query_only=1;"
+    )
 
     # load books
-    books_df = pd.DataFrame()
-    if "books" in tables:
-        books_df = pd.read_sql_query("SELECT * FROM books", src)
-        books_df.columns = [c.strip().lower() for c in books_df.columns]
-    elif "book_data_cleaned" in tables: 
-        books_df = pd.read_sql_query("SELECT * FROM book_data_cleaned", src)
-        books_df.columns = [c.strip().lower() for c in books_df.columns]
+    books_df = _read_fields(src, "books", _BOOK_FIELDS)
+    if books_df is None:
+        books_df = _read_fields(src, "book_data_cleaned", _BOOK_FIELDS)
+    if books_df is None:
+        books_df = pd.DataFrame()
 
 
     # movies
     movies_df = pd.DataFrame()
     for t in ["movies", "movie_overall_data"]:
-        if t in tables:
-            movies_df = pd.read_sql_query(f"SELECT * FROM {t}", src)
-            movies_df.columns = [c.strip().lower() for c in movies_df.columns]
-            if not movies_df.empty:
-                print(f"Loaded movie metadata from: {t}")
-                break
+        df = _try_read(src, t, _MOVIE_COLS)
+        if df is not None and not df.empty:
+            movies_df = df
+            print(f"Loaded movie metadata from: {t}")
+            break
 
+    # tmdb -> imdb: the mapping table is only ever a dict, so it's streamed straight off
+    # the sqlite cursor (no DataFrame); then topped up by the movie table itself
     tmdb_to_imdb = {}
-    if "tmdb_to_imdb_id_mapping" in tables:
-        map_df = pd.read_sql_query("SELECT * FROM tmdb_to_imdb_id_mapping", src)
-        map_df.columns = [c.strip().lower() for c in map_df.columns]
-        tmdb_col = "tmdbid" if "tmdbid" in map_df.columns else "tmdb_id"
-        imdb_col = "imdbid" if "imdbid" in map_df.columns else "imdb_id"
-        
-        if tmdb_col in map_df.columns and imdb_col in map_df.columns:
-            for _, r in map_df.iterrows():
-                t = r.get(tmdb_col)
-                i = r.get(imdb_col)
-                if pd.notna(t) and pd.notna(i):
-                    tmdb_to_imdb[int(t)] = str(i)
+    have = _table_columns(src, "tmdb_to_imdb_id_mapping")
+    tmdb_col = next((have[c] for c in ("tmdbid", "tmdb_id") if c in have), None)
+    imdb_col = next((have[c] for c in ("imdbid", "imdb_id") if c in have), None)
+    if tmdb_col and imdb_col:
+        tmdb_to_imdb.update(src.execute(f"""
+            SELECT CAST("{tmdb_col}" AS INTEGER), CAST("{imdb_col}" AS TEXT)
+            FROM tmdb_to_imdb_id_mapping
+            WHERE "{imdb_col}" IS NOT NULL AND CAST("{tmdb_col}" AS INTEGER) > 0
+        """))
 
     if not movies_df.empty:
         tmdb_col = "tmdbid" if "tmdbid" in movies_df.columns else "tmdb_id"
         imdb_col = "imdbid" if "imdbid" in movies_df.columns else "imdb_id"
-
         if tmdb_col in movies_df.columns and imdb_col in movies_df.columns:
-            for _, r in movies_df.iterrows():
-                t = r.get(tmdb_col)
-                i = r.get(imdb_col)
-                if pd.notna(t) and pd.notna(i):
-                    tmdb_to_imdb[int(t)] = str(i)
-    
+            pairs = pd.DataFrame({
+                "tmdb": pd.to_numeric(movies_df[tmdb_col], errors="coerce"),
+                "imdb": movies_df[imdb_col],
+            }).dropna()
+            tmdb_to_imdb.update(zip(pairs["tmdb"].astype("int64"), pairs["imdb"].astype(str)))
 
     imdb_to_genre = {}
-    if "movie_genres" in tables:
-        movie_genres_df = pd.read_sql_query("SELECT * FROM movie_genres", src)
-        movie_genres_df.columns = [c.strip().lower() for c in movie_genres_df.columns]
-        if not movie_genres_df.empty and "imdbid" in movie_genres_df.columns and "genre" in movie_genres_df.columns:
+    # streamed like movie_actor_director; only the distinct (key, genre) pairs are kept per chunk
+    genre_chunks = _try_read(src, "movie_genres", _GENRE_COLS, chunksize=READ_CHUNK_SIZE)
+    if genre_chunks is not None:
+        genre_pairs = []
+        for genre_df in genre_chunks:
+            if "imdbid" not in genre_df.columns or "genre" not in genre_df.columns:
+                break
             # Get the numeric key
-            movie_genres_df["imdb_key"] = movie_genres_df["imdbid"].apply(
-                lambda x: _derive_movie_id_source_from_imdb(str(x)) if pd.notna(x) else None
-            )
-            # Group by the numeric key and join genres
-            genre_groups = movie_genres_df.groupby("imdb_key")["genre"].apply(lambda x: ", ".join(x.astype(str).unique()))
-            imdb_to_genre = genre_groups.to_dict()
+            genre_df["imdb_key"] = _imdb_key_series(genre_df["imdbid"])
+            genre_pairs.append(genre_df[["imdb_key", "genre"]].dropna().astype({"genre": str}).drop_duplicates())
+        if genre_pairs:
+            # one groupby over all pairs, joined with str.join (no per-group lambda)
+            mg = pd.concat(genre_pairs, ignore_index=True).drop_duplicates()
+            imdb_to_genre = mg.groupby("imdb_key", sort=False)["genre"].agg(", ".join).to_dict()
             print(f"Loaded {len(imdb_to_genre)} movie genre mappings")
 
-    people_df = pd.DataFrame()
     imdb_to_director = {}
     actors_data = [] # Will store tuples of (imdb_key, actor_id, actor_name, role)
     unique_actors = {} # Will store {actor_id: actor_name}
     
-    if "movie_actor_director" in tables:
-        people_df = pd.read_sql_query("SELECT * FROM movie_actor_director", src)
-        people_df.columns = [c.strip().lower() for c in people_df.columns]
-        
-        movie_id_col = "tconst" if "tconst" in people_df.columns else "imdbid"
-        person_id_col = "nconst" if "nconst" in people_df.columns else "person_id"
-        name_col = "primaryname" if "primaryname" in people_df.columns else "name"
-        
-        for _, r in people_df.iterrows():
-            imdb_key = _derive_movie_id_source_from_imdb(r.get(movie_id_col))
-            person_id = r.get(person_id_col)
-            name = r.get(name_col)
-            category = r.get("category")
-            
-            if not imdb_key or not person_id or not name:
+    # biggest source table: stream it so only one chunk is ever held as a DataFrame
+    # only directors and cast are used; writers/producers/crew are filtered out inside sqlite
+    people_chunks = _try_read(src, "movie_actor_director", _PEOPLE_COLS,
+                              filters={"category": ("director", "actor", "actress")},
+                              chunksize=READ_CHUNK_SIZE)
+    if people_chunks is not None:
+        for people_df in people_chunks:
+            movie_id_col = "tconst" if "tconst" in people_df.columns else "imdbid"
+            person_id_col = "nconst" if "nconst" in people_df.columns else "person_id"
+            name_col = "primaryname" if "primaryname" in people_df.columns else "name"
+            if not {movie_id_col, person_id_col, name_col, "category"} <= set(people_df.columns):
                 continue
-
-            if category == 'director':
-                if imdb_key not in imdb_to_director:
-                    imdb_to_director[imdb_key] = name
+            people_df["imdb_key"] = _imdb_key_series(people_df[movie_id_col])
+            people_df["_role"] = _none_na(_coalesce(people_df, "role", "characters"))
+            # rows missing a key, person or name are dropped up front, not checked per row
+            people_df = people_df.dropna(subset=["imdb_key", person_id_col, name_col])
+            people_df = people_df[(people_df[person_id_col] != "") & (people_df[name_col] != "")]
             
-            elif category in ('actor', 'actress'):
-                role = r.get("role") or r.get("characters") 
-                actors_data.append((imdb_key, person_id, name, role))
-                if person_id not in unique_actors:
-                    unique_actors[person_id] = name
+            # split by category once; directors/actors are de-duplicated per chunk before
+            # touching the dicts (first one seen wins, same as before)
+            directors = people_df[people_df["category"] == 'director'].drop_duplicates("imdb_key")
+            for imdb_key, name in zip(directors["imdb_key"], directors[name_col]):
+                imdb_to_director.setdefault(imdb_key, name)
+
+            # one cast row per (movie, actor) -- repeats only become redundant ON CONFLICT work later
+            actors = people_df[people_df["category"].isin(('actor', 'actress'))].drop_duplicates(["imdb_key", person_id_col])
+            actors_data.extend(zip(actors["imdb_key"], actors[person_id_col], actors[name_col], actors["_role"]))
+            distinct_actors = actors.drop_duplicates(person_id_col)
+            for person_id, name in zip(distinct_actors[person_id_col], distinct_actors[name_col]):
+                unique_actors.setdefault(person_id, name)
         
         print(f"Loaded {len(imdb_to_director)} director mappings")
         print(f"Loaded {len(unique_actors)} unique actors")
@@ -164,9 +361,9 @@ def load_dw_from_bfr():
     links_df = pd.DataFrame()
     prefers = ["wiki_book_movie_ids_matching", "booksmovies"]
     for t in prefers:
-        if t in tables:
-            links_df = pd.read_sql_query(f"SELECT * FROM {t}", src)
-            links_df.columns = [c.strip().lower() for c in links_df.columns]
+        df = _try_read(src, t, _LINK_COLS)
+        if df is not None:
+            links_df = df
             print(f"Loaded link data from: {t}")
             break
     if links_df.empty:
@@ -174,97 +371,64 @@ def load_dw_from_bfr():
         src.close()
         return
     
-    imdb_to_movie = {}
+    # movie/book attributes are cleaned column-wise up front and kept as frames keyed by source id
+    movie_info = pd.DataFrame(columns=["title", "release_date", "vote_average", "vote_count",
+                                       "distributor", "budget", "revenue"])
     if not movies_df.empty:
-        for _, r in movies_df.iterrows():
-            raw_imdb = r.get("imdbid")
-            key = _derive_movie_id_source_from_imdb(str(raw_imdb)) if pd.notna(raw_imdb) else None
-            if not key:
-                continue
-            
-            release_date = _coerce_date(r.get("release_date") or r.get("year"))
-
-            imdb_to_movie[key] = {
-                "imdb_id": str(raw_imdb),
-                "title": r.get("title") or r.get("original_title") or r.get("full_name"),
-                "release_date": release_date,
-                "vote_average": _safe_float(r.get("averagerating") or r.get("rating_average") or r.get("vote_average"), lo=0, hi=10),
-                "vote_count": _safe_int(r.get("numvotes") or r.get("vote_count")),
-                "distributor": r.get("distributor") if "distributor" in movies_df.columns else None,
-                "genre": imdb_to_genre.get(key), 
-                "director": imdb_to_director.get(key), 
-                "budget": _safe_int(r.get("budget")), 
-                "revenue": _safe_int(r.get("revenue")), 
-            }
+        movies_df["imdb_key"] = _imdb_key_series(movies_df["imdbid"]) if "imdbid" in movies_df.columns else pd.NA
+        m = movies_df[movies_df["imdb_key"].notna()]
+        movie_info = pd.DataFrame({
+            "title": _coalesce(m, "title", "original_title", "full_name").astype("string"),
+            "release_date": _coerce_date_series(_coalesce(m, "release_date", "year")),
+            "vote_average": _safe_float_series(_coalesce(m, "averagerating", "rating_average", "vote_average"), lo=0, hi=10),
+            "vote_count": _safe_int_series(_coalesce(m, "numvotes", "vote_count")),
+            "distributor": _coalesce(m, "distributor").astype("string"),
+            "budget": _safe_int_series(_coalesce(m, "budget")),
+            "revenue": _safe_int_series(_coalesce(m, "revenue")),
+        }, index=m.index)
+        movie_info.index = m["imdb_key"]
+        movie_info = movie_info[~movie_info.index.duplicated(keep="last")]
 
     # book measures
-    book_measures = {}
+    book_info = pd.DataFrame(columns=["title", "authors", "isbn", "pub_date", "language_code",
+                                      "num_pages", "avg_rating", "ratings_count", "text_reviews_count"])
     if not books_df.empty:
-        for _, r in books_df.iterrows():
-    
-            src_id = (r.get("goodreads_book_id") or r.get("book_id"))
-            if pd.isna(src_id): 
-                continue
-            src_id = str(int(src_id)) if not isinstance(src_id, str) else src_id.strip()
-            
-            pub_date = _coerce_date(r.get("publication_date") or r.get("year"))
-            
-            book_measures[src_id] = {
-                "title": r.get("title"),
-                "authors": r.get("author") or r.get("authors"), 
-                "isbn": r.get("isbn"),
-                "pub_date": pub_date,
-                "language_code": (r.get("language_code") or None),
-                "num_pages": _safe_int(r.get("length") or r.get("num_pages")), 
-                "avg_rating": _safe_float(r.get("avg_rating") or r.get("average_rating"), lo=0, hi=5), 
-                "ratings_count": _safe_int(r.get("rating_count") or r.get("ratings_count")), 
-                "text_reviews_count": _safe_int(r.get("review_count") or r.get("work_text_reviews_count") or r.get("text_reviews_count")),
-            }
+        src_ids = _source_id_series(books_df["src"])
+        book_info = pd.DataFrame({
+            "title": books_df["title"].astype("string"),
+            "authors": books_df["authors"].astype("string"),
+            "isbn": books_df["isbn"].astype("string"),
+            "pub_date": _coerce_date_series(books_df["pub_date"]),
+            "language_code": books_df["language_code"].astype("string"),
+            "num_pages": _safe_int_series(books_df["num_pages"]),
+            "avg_rating": _safe_float_series(books_df["avg_rating"], lo=0, hi=5),
+            "ratings_count": _safe_int_series(books_df["ratings_count"]),
+            "text_reviews_count": _safe_int_series(books_df["text_reviews_count"]),
+        }, index=books_df.index)
+        book_info.index = src_ids
+        book_info = book_info[book_info.index.notna()]
+        book_info = book_info[~book_info.index.duplicated(keep="last")]
+
+    # imdb key per link row: first usable imdb column, else map through tmdb
+    link_keys = pd.Series(pd.NA, index=links_df.index, dtype="string")
+    for cand in ["imdb_id", "movie_imdb_id", "imdb", "ttid", "imdbid"]:
+        if cand in links_df.columns:
+            link_keys = link_keys.fillna(_imdb_key_series(links_df[cand]))
+    for cand in ["tmdb_id", "movie_tmdb_id", "tmdb", "tmdbid"]:
+        if cand in links_df.columns:
+            mapped = pd.to_numeric(links_df[cand], errors="coerce").map(tmdb_to_imdb)
+            link_keys = link_keys.fillna(_imdb_key_series(mapped))
+
+    # book id per link row: first non-null goodreads id column
+    link_bids = pd.Series(pd.NA, index=links_df.index, dtype="string")
+    for cand in ["goodreads_book_id", "book_id", "id_goodreads"]:
+        if cand in links_df.columns:
+            link_bids = link_bids.fillna(_source_id_series(links_df[cand]))
 
     # Normalize links
-    norm_links = []
-    for _, r in links_df.iterrows():
-        # book id
-        bid = None
-     
-        for cand in ["goodreads_book_id", "book_id", "id_goodreads"]:
-            if cand in links_df.columns and pd.notna(r.get(cand)):
-                bid = str(int(r[cand])) if not isinstance(r[cand], str) else r[cand].strip()
-                break
-        if not bid:
-            continue
-
-        imdb_key = None
-        # common imdb columns
-
-        for cand in ["imdb_id", "movie_imdb_id", "imdb", "ttid", "imdbid"]:
-            if cand in links_df.columns and pd.notna(r.get(cand)):
-                imdb_key = _derive_movie_id_source_from_imdb(str(r[cand]))
-                if imdb_key:
-                    break
-
-        # If only tmdb is present, try to map it
-        if not imdb_key:
-        
-            for cand in ["tmdb_id", "movie_tmdb_id", "tmdb", "tmdbid"]:
-                if cand in links_df.columns and pd.notna(r.get(cand)):
-                    try:
-                        tmdb_id = int(r[cand])
-                        imdb_id = tmdb_to_imdb.get(tmdb_id)
-                        if imdb_id:
-                            imdb_key = _derive_movie_id_source_from_imdb(imdb_id)
-                    except Exception:
-                        pass
-                    if imdb_key:
-                        break
-
-        if not imdb_key:
-            continue 
-
-        norm_links.append((bid, imdb_key))
-    
-
-    norm_links = sorted(list(set(norm_links)))
+    linked = link_bids.notna() & (link_bids != "") & link_keys.notna()
+    # distinct (book, movie) pairs; upserts don't care about order so nothing is sorted
+    norm_links = pd.DataFrame({"bid": link_bids[linked], "mid": link_keys[linked]}).drop_duplicates(ignore_index=True)
 
     print(f"Link rows discovered: {len(norm_links)}")
 
@@ -277,179 +441,127 @@ def load_dw_from_bfr():
         print("DW load complete: 0 rows inserted.")
         return
 
+    # Dim_Book: defaults and truncation as column ops over the linked books
+    book_ids = pd.Series(norm_links["bid"].unique(), dtype="string")
+    bm = book_info.reindex(book_ids).reset_index(drop=True)
+    book_df = pd.DataFrame({
+        "src": book_ids,
+        "isbn": bm["isbn"].astype("string"),
+        "title": bm["title"].astype("string").fillna("Book " + book_ids).str[:500],
+        "author": bm["authors"].astype("string").str[:500],
+        "pub_date": bm["pub_date"],
+        "lang": bm["language_code"].astype("string").str.upper().str[:3],
+        "pages": pd.to_numeric(bm["num_pages"]).astype("Int64"),
+    })
+
+    # Dim_Movie: genre/director come straight from the people/genre maps
+    movie_ids = pd.Series(norm_links["mid"].unique(), dtype="string")
+    mm = movie_info.reindex(movie_ids).reset_index(drop=True)
+    movie_df = pd.DataFrame({
+        "src": movie_ids,
+        "title": mm["title"].astype("string").fillna("Movie tt" + movie_ids).str[:500],
+        "rdate": mm["release_date"],
+        "ryear": pd.to_datetime(mm["release_date"], errors="coerce").dt.year.astype("Int64"),
+        "dist": mm["distributor"].astype("string"),
+        "genre": movie_ids.map(imdb_to_genre).astype("string").str[:100],
+        "director": movie_ids.map(imdb_to_director).astype("string").str[:255],
+    })
+
+    # Dim_Date for release dates
+    release_dates = movie_df["rdate"].dropna().unique()
+    date_rows = [{"sk": _date_to_sk(d), "d": d} for d in release_dates]
+
+    #dim actor
+    actor_df = pd.DataFrame({
+        "src_id": pd.Series(list(unique_actors.keys()), dtype="string"),
+        "name": pd.Series(list(unique_actors.values()), dtype="string").str[:255],
+    })
+
     # load into dw
+    # one transaction for everything: dims, dates, bridge and fact commit together or not at all,
+    # so a failed fact step can't leave dims behind without their bridge/fact rows
     with pg.begin() as c:
-        c.execute(text(f"SET search_path TO {DW_SCHEMA}"))
-
-        book_src_to_sk = {}
-        movie_src_to_sk = {}
-
-        actor_src_to_sk = {}
-        inserted_facts = 0
-        inserted_bridge = 0
-
-        # Dim_Book
-        for book_src_id in sorted({b for b, _ in norm_links}):
-            bm = book_measures.get(book_src_id, {})
-            res = c.execute(text("""
-                INSERT INTO Dim_Book
-                    (Book_ID_Source, ISBN, Title, Author, Publisher, Publication_Date, Language_Code, Num_Pages)
-                VALUES
-                    (:src, :isbn, :title, :author, NULL, :pub_date, :lang, :pages)
-                ON CONFLICT (Book_ID_Source) DO UPDATE SET
-                    ISBN = EXCLUDED.ISBN,
-                    Title = EXCLUDED.Title,
-                    Author = EXCLUDED.Author,
-                    Publication_Date = EXCLUDED.Publication_Date,
-                    Language_Code = EXCLUDED.Language_Code,
-                    Num_Pages = EXCLUDED.Num_Pages
-                RETURNING Book_SK
-            """), {
-                "src": book_src_id,
-                "isbn": bm.get("isbn"),
-                "title": (bm.get("title") or f"Book {book_src_id}")[:500],
-                "author": (bm.get("authors") or None)[:500] if bm.get("authors") else None,
-                "pub_date": bm.get("pub_date"),
-                "lang": (str(bm.get("language_code")).upper()[:3] if bm.get("language_code") else None),
-                "pages": bm.get("num_pages")
-            }).scalar()
-            if res is None:
-                res = c.execute(text("SELECT Book_SK FROM Dim_Book WHERE Book_ID_Source=:src"), {"src": book_src_id}).scalar()
-            
-            if res is not None:
-                book_src_to_sk[book_src_id] = int(res)
-
-        # Dim_Movie
-        for movie_src_id in sorted({m for _, m in norm_links}):
-            mm = imdb_to_movie.get(movie_src_id, {})
-            
-     
-            genre_val = mm.get("genre") or imdb_to_genre.get(movie_src_id)
-            director_val = mm.get("director") or imdb_to_director.get(movie_src_id)
-            
-        
-            res = c.execute(text("""
-                INSERT INTO Dim_Movie
-                    (Movie_ID_Source, Movie_Title_Source, Release_Date, Release_Year, Distributor, Genre, Director)
-                VALUES
-                    (:src, :title, :rdate, :ryear, :dist, :genre, :director)
-                ON CONFLICT (Movie_ID_Source) DO UPDATE SET
-                    Movie_Title_Source = EXCLUDED.Movie_Title_Source,
-                    Release_Date       = EXCLUDED.Release_Date,
-                    Release_Year       = EXCLUDED.Release_Year,
-                    Distributor        = EXCLUDED.Distributor,
-                    Genre              = EXCLUDED.Genre,
-                    Director           = EXCLUDED.Director
-                RETURNING Movie_SK
-            """), {
-                "src": movie_src_id,
-                "title": (mm.get("title") or f"Movie tt{movie_src_id}")[:500],
-                "rdate": mm.get("release_date"),
-                "ryear": (mm["release_date"].year if mm.get("release_date") else None),
-                "dist":  mm.get("distributor"),
-                "genre": genre_val[:100] if genre_val else None,        
-                "director": director_val[:255] if director_val else None, 
-            }).scalar()
-
-            if res is None:
-                res = c.execute(text("SELECT Movie_SK FROM Dim_Movie WHERE Movie_ID_Source=:src"), {"src": movie_src_id}).scalar()
-            
-            if res is not None:
-                movie_src_to_sk[movie_src_id] = int(res)
-
-        # Dim_Date for release dates
-        for movie_src_id, msk in movie_src_to_sk.items():
-            mm = imdb_to_movie.get(movie_src_id, {})
-            rdate = mm.get("release_date")
-            if rdate:
-                dsk = _date_to_sk(rdate) # Use helper function
-                c.execute(text("""
-                    INSERT INTO Dim_Date (Date_SK, Full_Date, Year, Month, Month_Name, Quarter, Day_of_Week)
-                    VALUES (:sk, :d, EXTRACT(YEAR FROM :d)::INT, EXTRACT(MONTH FROM :d)::INT,
-                            TO_CHAR(:d, 'Month'), CONCAT('Q', EXTRACT(QUARTER FROM :d)::INT),
-                            TO_CHAR(:d, 'Day'))
-                    ON CONFLICT (Date_SK) DO NOTHING
-                """), {"sk": dsk, "d": rdate})
-
-        #dim actor
-        for actor_src_id, actor_name in unique_actors.items():
-            res = c.execute(text("""
-                INSERT INTO Dim_Actor (Actor_ID_Source, Name)
-                VALUES (:src_id, :name)
-                ON CONFLICT (Actor_ID_Source) DO UPDATE SET
-                    Name = EXCLUDED.Name
-                RETURNING Actor_SK
-            """), {"src_id": actor_src_id, "name": actor_name[:255]}).scalar()
-            
-            if res is None:
-                res = c.execute(text("SELECT Actor_SK FROM Dim_Actor WHERE Actor_ID_Source=:src_id"), {"src_id": actor_src_id}).scalar()
-            
-            if res is not None:
-                actor_src_to_sk[actor_src_id] = int(res)
-     
+        c.execute(_SET_SEARCH_PATH_SQL)
+        c.execute(_ASYNC_COMMIT_SQL)
+
+        # full refresh: the plain secondary indexes on the tables we bulk write are dropped
+        # for the load and rebuilt once at the end (unique ones stay, the upserts need them);
+        # drop, load and rebuild share the transaction, so a failure rolls all of it back
+        dropped_indexes = []
+        if rebuild_indexes:
+            for table in ("dim_movie", "fact_book_adaptation"):
+                dropped_indexes += _drop_secondary_indexes(c, table)
+            print(f"Dropped {len(dropped_indexes)} secondary index(es) on Dim_Movie/Fact_Book_Adaptation for the load.")
+
+        book_src_to_sk = _load_book_dim(c, book_df)
+        movie_src_to_sk = _load_movie_dim(c, movie_df)
+        actors_upserted = _load_actor_dim(c, actor_df)
+
+        c.execute(_DIM_DATE_INSERT_SQL, _as_arrays(date_rows, ["sk", "d"]))
+
+        # bridge: SKs are resolved by joining the dims server-side, orphans simply drop out of the join
+        # one row per (movie, actor) -- first role wins, same as DO NOTHING would keep
+        bridge = {}
         for imdb_key, actor_id, actor_name, role in actors_data:
-            msk = movie_src_to_sk.get(imdb_key)
-            ask = actor_src_to_sk.get(actor_id)
-            
-            if msk and ask:
-                c.execute(text("""
-                    INSERT INTO Bridge_Movie_Actor (Movie_SK, Actor_SK, Role)
-                    VALUES (:msk, :ask, :role)
-                    ON CONFLICT (Movie_SK, Actor_SK) DO NOTHING
-                """), {"msk": msk, "ask": ask, "role": (role[:100] if role else None)})
-                inserted_bridge += 1
-
-
-        # Fact
-        for book_src_id, movie_src_id in norm_links:
-            bsk = book_src_to_sk.get(book_src_id)
-            msk = movie_src_to_sk.get(movie_src_id)
-            if not bsk or not msk:
-                continue
-
-            bm = book_measures.get(book_src_id, {})
-            mm = imdb_to_movie.get(movie_src_id, {})
+            if imdb_key in movie_src_to_sk:
+                bridge.setdefault((imdb_key, str(actor_id)), str(role)[:100] if role else None)
+        bridge_rows = [
+            {"movie_src": movie_src, "actor_src": actor_src, "role": role}
+            for (movie_src, actor_src), role in bridge.items()
+        ]
+        c.execute(_TEMP_BRIDGE_SQL)
+        _copy_df(c, pd.DataFrame(bridge_rows, columns=["movie_src", "actor_src", "role"]), "temp_bridge")
+        inserted_bridge = c.execute(_BRIDGE_INSERT_SQL).rowcount
+
+
+        # Fact: SK lookup + orphan filter as column ops, measures joined in by source id
+        links = norm_links.copy()
+        links["bsk"] = links["bid"].map(book_src_to_sk)
+        links["msk"] = links["mid"].map(movie_src_to_sk)
+        # Movie_Release_Date_SK is NOT NULL: links to movies without a release date can't be facts
+        release_dates = movie_info["release_date"].reindex(links["mid"]).set_axis(links.index)
+        links["dsk"] = pd.to_numeric(release_dates.map(_date_to_sk, na_action="ignore")).astype("Int64")
+        mask = links["bsk"].notna() & links["msk"].notna() & links["dsk"].notna()
+        skipped_links = int((~mask).sum())
+        links = links[mask].reset_index(drop=True)
+
+        bm = book_info.reindex(links["bid"]).reset_index(drop=True)
+        mm = movie_info.reindex(links["mid"]).reset_index(drop=True)
+
+        budget = pd.to_numeric(mm["budget"]).astype("Int64")
+        revenue = pd.to_numeric(mm["revenue"]).astype("Int64")
+        # profit/ROI are derived in the INSERT from revenue and budget
+        fact_df = pd.DataFrame({
+            "bsk": links["bsk"].astype("Int64"),
+            "msk": links["msk"].astype("Int64"),
+            "dsk": links["dsk"],
+            "revenue": revenue,
+            "budget": budget,
+            "bavg": pd.to_numeric(bm["avg_rating"]),
+            "brc": pd.to_numeric(bm["ratings_count"]).astype("Int64"),
+            "btrc": pd.to_numeric(bm["text_reviews_count"]).astype("Int64"),
+            "mavg": pd.to_numeric(mm["vote_average"]),
+            "mrc": pd.to_numeric(mm["vote_count"]).astype("Int64"),
+        })
+
+        # facts are insert-only: COPY into a temp table, then one INSERT ... SELECT
+        c.execute(_TEMP_FACT_SQL)
+        _copy_df(c, fact_df, "temp_fact_book_adaptation")
+        inserted_facts = c.execute(_FACT_INSERT_SQL).rowcount
+
+        if dropped_indexes:
+            _recreate_indexes(c, dropped_indexes)
+            print(f"Rebuilt {len(dropped_indexes)} secondary index(es).")
 
-            rdate = mm.get("release_date")
-            date_sk = _date_to_sk(rdate) if rdate else None
-            
-      
-            budget = mm.get("budget")
-            revenue = mm.get("revenue")
-            profit = (revenue - budget) if budget is not None and revenue is not None else None
-            roi = (profit / budget * 100) if profit is not None and budget is not None and budget != 0 else None
-
-      
-            c.execute(text("""
-                INSERT INTO Fact_Book_Adaptation
-                    (Book_SK, Movie_SK, Movie_Release_Date_SK,
-                     Box_Office_Gross, Tickets_Sold, Production_Budget, Profit, ROI,
-                     Book_Average_Rating, Book_Ratings_Count, Book_Text_Reviews_Count,
-                     Movie_Average_Rating, Movie_Review_Count)
-                VALUES
-                    (:bsk, :msk, :dsk,
-                     :revenue, NULL, :budget, :profit, :roi,
-                     :bavg, :brc, :btrc,
-                     :mavg, :mrc)
-                ON CONFLICT (Book_SK, Movie_SK) DO NOTHING
-            """), {
-                "bsk": bsk, "msk": msk, "dsk": date_sk,
-                "revenue": revenue,
-                "budget": budget,
-                "profit": profit,
-                "roi": roi,
-                "bavg": bm.get("avg_rating"),
-                "brc": bm.get("ratings_count"),
-                "btrc": bm.get("text_reviews_count"),
-                "mavg": mm.get("vote_average"),
-                "mrc": mm.get("vote_count"),
-            })
-            inserted_facts += 1
+    with pg.begin() as c:
+        c.execute(_SET_SEARCH_PATH_SQL)
+        c.execute(_ANALYZE_SQL)
 
     src.close()
     print("DW load complete:")
     print(f"  Books upserted (distinct Book_ID_Source): {len(book_src_to_sk)}")
     print(f"  Movies upserted (distinct IMDb ids):     {len(movie_src_to_sk)}")
-    print(f"  Actors upserted (distinct Actor_ID):    {len(actor_src_to_sk)}")
+    print(f"  Actors upserted (distinct Actor_ID):    {actors_upserted}")
     print(f"  Movie-Actor bridge rows inserted:         {inserted_bridge}")
-    print(f"  Fact rows inserted/updated:               {inserted_facts}")
\ No newline at end of file
+    print(f"  Fact rows inserted/updated:               {inserted_facts}")
+    print(f"  Links skipped (not in DW / no release):   {skipped_links}")
\ No newline at end of file
@@ -1,58 +1,13 @@
 import pandas as pd
-import sqlite3, os, re
+import os
 from sqlalchemy import create_engine, text
-from datetime import datetime, date
+from loaders._common import DW_SCHEMA, _ASYNC_COMMIT_SQL, _coalesce, _coerce_date_series, _safe_float_series, _safe_int_series, _copy_df, _PG_INT_MAX
 from config import PG_URL, BOOKS_PATH
 
-DW_SCHEMA = "dw_books_movies" #our star schema where the data will be loaded
-
-def _derive_movie_id_source_from_imdb(imdb_id: str | None) -> str | None:
-    #movie natural key from IMDb so we can upsert easily
-    if not imdb_id or not isinstance(imdb_id, str):
-        return None
-
-    m = re.search(r"tt?(\d+)", imdb_id.strip())
-    return m.group(1) if m else None
-
-def _coerce_date(val) -> date | None:
-    if val is None:
-        return None
-    try:
-
-        if isinstance(val, (int, float)) and 1800 < val < 2100:
-             # Handle integer years
-            return date(int(val), 1, 1)
-        
-        dt = pd.to_datetime(val, errors="coerce")
-        if pd.isna(dt):
-            # Try parsing just the year if full parse fails
-            m = re.search(r"(\d{4})", str(val))
-            if m:
-                return date(int(m.group(1)), 1, 1)
-            return None
-        return dt.date()
-    except Exception:
-        return None
-
-#date
-def _date_to_sk(d: date) -> int:
-    # YYYYMMDD as int
-    return d.year * 10000 + d.month * 100 + d.day
-
-def _safe_float(v, lo=None, hi=None):
-    try:
-        f = float(v)
-        if lo is not None and f < lo: return None
-        if hi is not None and f > hi: return None
-        return f
-    except Exception:
-        return None
-    
-def _safe_int(v):
-        try:
-            return int(float(v))
-        except Exception:
-            return None 
+# books.csv columns the loader uses (headers are matched stripped + lower-cased)
+_BOOKS_CSV_COLS = {"bookid", "title", "authors", "average_rating", "isbn", "isbn13", "language_code",
+                   "num_pages", "ratings_count", "text_reviews_count", "publication_date", "publisher"}
+_BOOKS_CSV_TEXT_COLS = ["title", "authors", "isbn", "isbn13", "language_code", "publication_date", "publisher"]
 
 #load the data from the source --> eto lang nabago
 def load_dw_from_books_csv():
@@ -69,8 +24,17 @@ def load_dw_from_books_csv():
     
     #Read CSV 
     try:
-        # skip bad lines
-        books_df = pd.read_csv(BOOKS_PATH, on_bad_lines='skip') 
+        # skip bad lines; C tokenizer in one pass (no chunked dtype guessing),
+        # only the columns we load are parsed, text columns typed up front
+        # (ISBNs kept as text so leading zeros survive)
+        books_df = pd.read_csv(
+            BOOKS_PATH,
+            engine='c',
+            low_memory=False,
+            on_bad_lines='skip',
+            usecols=lambda col: col.strip().lower() in _BOOKS_CSV_COLS,
+            dtype={col: "string" for col in _BOOKS_CSV_TEXT_COLS}
+        )
     except Exception as e:
         print(f"Error reading CSV file at {BOOKS_PATH}: {e}")
         return
@@ -85,117 +49,89 @@ def load_dw_from_books_csv():
 
     print(f"Loaded {len(books_df)} rows from books.csv")
 
-    fact_update_data = [] # To store data for fact update
     processed_books = 0
     updated_facts = 0
 
     with pg.begin() as c:
         c.execute(text(f"SET search_path TO {DW_SCHEMA}"))
+        c.execute(_ASYNC_COMMIT_SQL)
         print("Upserting data into Dim_Book...")
 
-        # Upsert Dim_Book 
-        for _, r in books_df.iterrows():
-            book_id_source = r.get('bookid')
-            if pd.isna(book_id_source):
-                continue
-            
-            # Clean book_id_source
-            book_id_source = str(_safe_int(book_id_source))
-            if not book_id_source:
-                continue
-            
-            pub_date = _coerce_date(r.get("publication_date"))
-            
-            # Prioritize isbn13, fall back to isbn
-            isbn = r.get('isbn13')
-            if pd.isna(isbn):
-                isbn = r.get('isbn')
-            
-            # Clean language code (e.g., 'en-US' -> 'EN')
-            lang = r.get('language_code')
-            if pd.notna(lang):
-                lang = str(lang).upper().split('-')[0][:3]
-            else:
-                lang = None
-
-            try:
-                res = c.execute(text("""
-                    INSERT INTO Dim_Book
-                        (Book_ID_Source, ISBN, Title, Author, Publisher, Publication_Date, Language_Code, Num_Pages)
-                    VALUES
-                        (:src, :isbn, :title, :author, :pub, :pub_date, :lang, :pages)
-                    ON CONFLICT (Book_ID_Source) DO UPDATE SET
-                        ISBN = EXCLUDED.ISBN,
-                        Title = EXCLUDED.Title,
-                        Author = EXCLUDED.Author,
-                        Publisher = EXCLUDED.Publisher,
-                        Publication_Date = EXCLUDED.Publication_Date,
-                        Language_Code = EXCLUDED.Language_Code,
-                        Num_Pages = EXCLUDED.Num_Pages
-                    RETURNING Book_SK
-                """), {
-                    "src": book_id_source,
-                    "isbn": str(isbn) if pd.notna(isbn) else None,
-                    "title": (r.get("title") or f"Book {book_id_source}")[:500],
-                    "author": (r.get("authors") or None)[:500] if pd.notna(r.get("authors")) else None,
-                    "pub": (r.get("publisher") or None)[:255] if pd.notna(r.get("publisher")) else None,
-                    "pub_date": pub_date,
-                    "lang": lang,
-                    "pages": _safe_int(r.get("num_pages"))
-                }).scalar()
-
-                if res is None: # Get SK if a conflict happened but did not return
-                    res = c.execute(text("SELECT Book_SK FROM Dim_Book WHERE Book_ID_Source=:src"), {"src": book_id_source}).scalar()
-                
-                if res is not None:
-                    book_sk = int(res)
-                    processed_books += 1
-                    
-                    #Prepare Fact Table Update Data 
-                    fact_update_data.append({
-                        "bsk": book_sk,
-                        "bavg": _safe_float(r.get("average_rating"), lo=0, hi=5),
-                        "brc": _safe_int(r.get("ratings_count")),
-                        "btrc": _safe_int(r.get("text_reviews_count"))
-                    })
-            
-            except Exception as e:
-                print(f"Error processing bookID {book_id_source}: {e}")
-                continue 
+        # Clean every column at once, then upsert them all at once
+        src_ids = _safe_int_series(books_df['bookid'])
+        books_df = books_df[src_ids.notna()]
+        src_ids = src_ids[src_ids.notna()].astype("string")
+
+        # Prioritize isbn13, fall back to isbn
+        isbn = _coalesce(books_df, "isbn13", "isbn")
+        # Clean language code (e.g., 'en-US' -> 'EN')
+        lang = _coalesce(books_df, "language_code").astype("string").str.upper().str.split('-').str[0].str[:3]
+
+        # values that don't fit the Dim_Book / fact columns are cut to size or NULLed here, so one
+        # bad row can't fail the COPY/upsert (and with it the whole single-transaction load)
+        book_df = pd.DataFrame({
+            "src": src_ids.str[:100],
+            "isbn": isbn.astype("string").str.strip().str[:13],
+            "title": _coalesce(books_df, "title").astype("string").fillna("Book " + src_ids).str[:500],
+            "author": _coalesce(books_df, "authors").astype("string").str[:500],
+            "pub": _coalesce(books_df, "publisher").astype("string").str[:255],
+            "pub_date": _coerce_date_series(_coalesce(books_df, "publication_date")),
+            "lang": lang,
+            "pages": _safe_int_series(_coalesce(books_df, "num_pages"), lo=0, hi=_PG_INT_MAX),
+            "bavg": _safe_float_series(_coalesce(books_df, "average_rating"), lo=0, hi=5),
+            "brc": _safe_int_series(_coalesce(books_df, "ratings_count"), lo=0, hi=_PG_INT_MAX),
+            "btrc": _safe_int_series(_coalesce(books_df, "text_reviews_count"), lo=0, hi=_PG_INT_MAX),
+        }, index=books_df.index)
+        # an upsert can't touch the same key twice in one statement -> last row per bookID wins
+        book_df = book_df.drop_duplicates(subset=["src"], keep="last")
+
+        # one COPY carries both the Dim_Book columns and the book measures; the upsert and the
+        # fact backfill are then two set-based statements off the same temp table
+        c.execute(text("""
+            CREATE TEMPORARY TABLE temp_dim_book (
+                src TEXT, isbn TEXT, title TEXT, author TEXT, pub TEXT,
+                pub_date DATE, lang TEXT, pages INT,
+                bavg DECIMAL(4, 2), brc INT, btrc INT
+            ) ON COMMIT DROP;
+        """))
+        _copy_df(c, book_df, "temp_dim_book")
+        processed_books = c.execute(text("""
+            INSERT INTO Dim_Book
+                (Book_ID_Source, ISBN, Title, Author, Publisher, Publication_Date, Language_Code, Num_Pages)
+            SELECT src, isbn, title, author, pub, pub_date, lang, pages
+            FROM temp_dim_book
+            ON CONFLICT (Book_ID_Source) DO UPDATE SET
+                ISBN = EXCLUDED.ISBN,
+                Title = EXCLUDED.Title,
+                Author = EXCLUDED.Author,
+                Publisher = EXCLUDED.Publisher,
+                Publication_Date = EXCLUDED.Publication_Date,
+                Language_Code = EXCLUDED.Language_Code,
+                Num_Pages = EXCLUDED.Num_Pages
+            -- books already loaded unchanged are skipped instead of rewritten on every run
+            WHERE (Dim_Book.ISBN, Dim_Book.Title, Dim_Book.Author, Dim_Book.Publisher,
+                   Dim_Book.Publication_Date, Dim_Book.Language_Code, Dim_Book.Num_Pages)
+                  IS DISTINCT FROM
+                  (EXCLUDED.ISBN, EXCLUDED.Title, EXCLUDED.Author, EXCLUDED.Publisher,
+                   EXCLUDED.Publication_Date, EXCLUDED.Language_Code, EXCLUDED.Num_Pages)
+        """)).rowcount
 
         print(f"Processed {processed_books} rows for Dim_Book.")
 
         # Batch Update Fact_Book_Adaptation 
-        if fact_update_data:
-            print(f"Backfilling {len(fact_update_data)} fact rows with new book measures...")
-            
-            # Create a temporary table
-            c.execute(text("""
-                CREATE TEMPORARY TABLE temp_book_measures (
-                    book_sk INT PRIMARY KEY,
-                    b_avg_rating DECIMAL(4, 2),
-                    b_ratings_count INT,
-                    b_text_reviews_count INT
-                ) ON COMMIT DROP;
-            """))
-            
-            # Insert data
-            c.execute(text("""
-                INSERT INTO temp_book_measures (book_sk, b_avg_rating, b_ratings_count, b_text_reviews_count)
-                VALUES (:bsk, :bavg, :brc, :btrc)
-            """), fact_update_data)
-            
-            # join to temp table
-            result = c.execute(text("""
-                UPDATE Fact_Book_Adaptation f SET
-                    Book_Average_Rating = t.b_avg_rating,
-                    Book_Ratings_Count = t.b_ratings_count,
-                    Book_Text_Reviews_Count = t.b_text_reviews_count
-                FROM temp_book_measures t
-                WHERE f.Book_SK = t.book_sk; -- <-- FIXED: Overwrite existing data
-            """))
-            updated_facts = result.rowcount
+        # SKs resolved server-side through Dim_Book, so nothing has to come back to Python
+        print("Backfilling fact rows with new book measures...")
+        result = c.execute(text("""
+            UPDATE Fact_Book_Adaptation f SET
+                Book_Average_Rating = t.bavg,
+                Book_Ratings_Count = t.brc,
+                Book_Text_Reviews_Count = t.btrc
+            FROM temp_dim_book t
+            JOIN Dim_Book d ON d.Book_ID_Source = t.src
+            WHERE f.Book_SK = d.Book_SK; -- <-- FIXED: Overwrite existing data
+        """))
+        updated_facts = result.rowcount
             
     print("books.csv load complete.")
-    print(f"  Books upserted into Dim_Book: {processed_books}")
+    print(f"  Books inserted or changed in Dim_Book: {processed_books}")
     print(f"  Fact rows backfilled with measures: {updated_facts}")
\ No newline at end of file
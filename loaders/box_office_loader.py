@@ -1,69 +1,19 @@
 import pandas as pd
-import sqlite3, os, re
+import os
 from sqlalchemy import create_engine, text
-from datetime import datetime, date
+from loaders._common import DW_SCHEMA, _coerce_date_series, _safe_int_series, _clean_currency_series, _copy_df
 from config import PG_URL, BOX_OFFICE_PATH
 
-DW_SCHEMA = "dw_books_movies" #our star schema where the data will be loaded
+# header prefix -> column name used by the loader
+_BOX_OFFICE_COLS = {
+    'movie': 'movie',
+    'release da': 'release_date',
+    'distributor': 'distributor',
+    'genre': 'genre',
+    '2025 gros': 'gross',
+    'tickets sol': 'tickets',
+}
 
-def _derive_movie_id_source_from_imdb(imdb_id: str | None) -> str | None:
-    #movie natural key from IMDb so we can upsert easily
-    if not imdb_id or not isinstance(imdb_id, str):
-        return None
-    
-    m = re.search(r"tt?(\d+)", imdb_id.strip())
-    return m.group(1) if m else None
-
-def _coerce_date(val) -> date | None:
-    if val is None:
-        return None
-    try:
-    
-        if isinstance(val, (int, float)) and 1800 < val < 2100:
-             # Handle integer years
-            return date(int(val), 1, 1)
-        
-        dt = pd.to_datetime(val, errors="coerce")
-        if pd.isna(dt):
-            # Try parsing just the year if full parse fails
-            m = re.search(r"(\d{4})", str(val))
-            if m:
-                return date(int(m.group(1)), 1, 1)
-            return None
-        return dt.date()
-    except Exception:
-        return None
-
-#date
-def _date_to_sk(d: date) -> int:
-    # YYYYMMDD as int
-    return d.year * 10000 + d.month * 100 + d.day
-
-def _safe_float(v, lo=None, hi=None):
-    try:
-        f = float(v)
-        if lo is not None and f < lo: return None
-        if hi is not None and f > hi: return None
-        return f
-    except Exception:
-        return None
-    
-def _safe_int(v):
-        try:
-            return int(float(v)) 
-        except Exception:
-            return None 
-
-def _clean_currency(val) -> float | None:
-    """Removes $ and , from currency strings and converts to float."""
-    if pd.isna(val):
-        return None
-    try:
-        s = str(val).replace("$", "").replace(",", "")
-        return _safe_float(s)
-    except Exception:
-        return None
-    
 #load the data from the source --> eto lang nabago
 def load_dw_from_box_office():
     """
@@ -79,8 +29,13 @@ def load_dw_from_box_office():
     pg = create_engine(PG_URL)
     
     try:
-        # Load the CSV
-        df = pd.read_csv(BOX_OFFICE_PATH)
+        # Load the CSV -- only the columns we map, all as text (they're cleaned column-wise below)
+        df = pd.read_csv(
+            BOX_OFFICE_PATH,
+            engine='c',
+            usecols=lambda col: col.lower().strip().startswith(tuple(_BOX_OFFICE_COLS)),
+            dtype="string"
+        )
     except Exception as e:
         print(f"Error reading CSV file at {BOX_OFFICE_PATH}: {e}")
         return
@@ -88,12 +43,10 @@ def load_dw_from_box_office():
     col_map = {}
     for col in df.columns:
         c = col.lower().strip()
-        if c.startswith('movie'): col_map[col] = 'movie'
-        elif c.startswith('release da'): col_map[col] = 'release_date'
-        elif c.startswith('distributor'): col_map[col] = 'distributor'
-        elif c.startswith('genre'): col_map[col] = 'genre'
-        elif c.startswith('2025 gros'): col_map[col] = 'gross'
-        elif c.startswith('tickets sol'): col_map[col] = 'tickets'
+        for prefix, name in _BOX_OFFICE_COLS.items():
+            if c.startswith(prefix):
+                col_map[col] = name
+                break
     
     df = df.rename(columns=col_map)
 
@@ -110,61 +63,87 @@ def load_dw_from_box_office():
     updated_facts = 0
     skipped_rows = 0
 
+    # clean whole columns up front
+    release_dates = _coerce_date_series(df['release_date'])
+    box_df = pd.DataFrame({
+        "title": df['movie'].astype("string"),
+        "release_year": pd.to_datetime(release_dates, errors="coerce").dt.year.astype("Int64"),
+        "distributor": df['distributor'].astype("string") if 'distributor' in df.columns else None,
+        "genre": df['genre'].astype("string") if 'genre' in df.columns else None,
+        "gross": _clean_currency_series(df['gross']),
+        "tickets": _safe_int_series(df['tickets'].astype("string").str.replace(",", "", regex=False)),
+    })
+
+    # rows without a title or a parseable date can't be matched
+    box_df = box_df.dropna(subset=['title', 'release_year'])
+    skipped_rows += len(df) - len(box_df)
+    # one row per (title, year) so the UPDATE ... FROM joins are deterministic, merged like the old
+    # row-by-row loop did: gross/tickets from the last row, distributor/genre the last non-null
+    # value across the duplicates (its COALESCE kept an earlier value when a later row had none)
+    keys = ['title', 'release_year']
+    dim_vals = box_df.groupby(keys)[['distributor', 'genre']].last()
+    box_df = box_df.drop_duplicates(subset=keys, keep="last").set_index(keys)
+    for col in ('distributor', 'genre'):
+        box_df[col] = dim_vals[col]
+    box_df = box_df.reset_index()
+
     with pg.begin() as c:
         c.execute(text(f"SET search_path TO {DW_SCHEMA}"))
 
-        for _, r in df.iterrows():
-            title = r.get('movie')
-            release_date = _coerce_date(r.get('release_date'))
-            
-            if pd.isna(title) or not release_date:
-                skipped_rows += 1
-                continue 
-
-            release_year = release_date.year
-            
-            # Find the Movie_SK using the composite key of title + year
-            movie_sk = c.execute(text("""
-                SELECT Movie_SK FROM Dim_Movie
-                WHERE Movie_Title_Source = :title AND Release_Year = :year
-            """), {"title": title, "year": release_year}).scalar()
-            
-            if movie_sk:
-                #Update Dim_Movie
-                c.execute(text("""
-                    UPDATE Dim_Movie SET
-                        Distributor = COALESCE(:dist, Distributor),
-                        Genre = COALESCE(:genre, Genre)
-                    WHERE Movie_SK = :sk
-                """), {
-                    "dist": r.get('distributor'),
-                    "genre": r.get('genre'),
-                    "sk": movie_sk
-                })
-                updated_dims += 1
-                
-                #Update Fact_Book_Adaptation
-                gross_val = _clean_currency(r.get('gross'))
-                tickets_val = _safe_int(str(r.get('tickets')).replace(",", ""))
-
-                res = c.execute(text("""
-                    UPDATE Fact_Book_Adaptation SET
-                        Box_Office_Gross = :gross,
-                        Tickets_Sold = :tickets
-                    WHERE Movie_SK = :sk
-                """), {
-                    "gross": gross_val,
-                    "tickets": tickets_val,
-                    "sk": movie_sk
-                })
-                
-                if res.rowcount > 0:
-                    updated_facts += 1
-            else:
-                skipped_rows += 1
+        # COPY the cleaned CSV into a temp table, then two set-based updates joined on title + year
+        c.execute(text("""
+            CREATE TEMPORARY TABLE temp_box_office (
+                title TEXT,
+                release_year INT,
+                distributor TEXT,
+                genre TEXT,
+                gross NUMERIC,
+                tickets BIGINT
+            ) ON COMMIT DROP;
+        """))
+        _copy_df(c, box_df, "temp_box_office")
+
+        #Update Dim_Movie
+        # one targeted update per column, only where the CSV actually has a new value --
+        # rows that wouldn't change aren't rewritten (no dead tuples / WAL for no-ops)
+        updated_dims = c.execute(text("""
+            UPDATE Dim_Movie m SET
+                Distributor = t.distributor
+            FROM temp_box_office t
+            WHERE m.Movie_Title_Source = t.title AND m.Release_Year = t.release_year
+              AND t.distributor IS NOT NULL
+              AND m.Distributor IS DISTINCT FROM t.distributor
+        """)).rowcount
+        updated_dims += c.execute(text("""
+            UPDATE Dim_Movie m SET
+                Genre = t.genre
+            FROM temp_box_office t
+            WHERE m.Movie_Title_Source = t.title AND m.Release_Year = t.release_year
+              AND t.genre IS NOT NULL
+              AND m.Genre IS DISTINCT FROM t.genre
+        """)).rowcount
+
+        #Update Fact_Book_Adaptation
+        updated_facts = c.execute(text("""
+            UPDATE Fact_Book_Adaptation f SET
+                Box_Office_Gross = t.gross,
+                Tickets_Sold = t.tickets
+            FROM temp_box_office t
+            JOIN Dim_Movie m ON m.Movie_Title_Source = t.title AND m.Release_Year = t.release_year
+            WHERE f.Movie_SK = m.Movie_SK
+        """)).rowcount
+
+        # box office rows with no movie in the DW
+        skipped_rows += c.execute(text("""
+            SELECT COUNT(*) FROM temp_box_office t
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Dim_Movie m
+                WHERE m.Movie_Title_Source = t.title AND m.Release_Year = t.release_year
+            )
+        """)).scalar()
 
     print("Box Office (CSV) load complete.")
     print(f"  Rows processed: {len(df)}")
-    print(f"  Movies found & dimensions updated: {updated_dims}")
+    print(f"  Dim_Movie distributor/genre values changed: {updated_dims}")
     print(f"  Fact rows updated with financials: {updated_facts}")
     print(f"  Movies skipped (not found in DW): {skipped_rows}")
\ No newline at end of file
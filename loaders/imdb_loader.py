@@ -1,73 +1,159 @@
 import pandas as pd
-import sqlite3, os, re, io
+import os, io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from sqlalchemy import create_engine, text
-from datetime import datetime, date
+from loaders._common import DW_SCHEMA, _ASYNC_COMMIT_SQL, _copy_df, _drop_secondary_indexes, _recreate_indexes
 from config import PG_URL, IMDB_PATH
 
-DW_SCHEMA = "dw_books_movies" #our star schema where the data will be loaded
-
-def _derive_movie_id_source_from_imdb(imdb_id: str | None) -> str | None:
-    #movie natural key from IMDb so we can upsert easily
-    if not imdb_id or not isinstance(imdb_id, str):
-        return None
-     
-    m = re.search(r"tt?(\d+)", imdb_id.strip())
-    return m.group(1) if m else None
+class _ByteRange(io.RawIOBase):
+    # read-only view of [start, end) of a file so each worker can hand pandas just its slice
+    def __init__(self, path: str, start: int, end: int):
+        self._f = open(path, "rb")
+        self._f.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._left <= 0:
+            return 0
+        n = self._f.readinto(memoryview(b)[:min(len(b), self._left)])
+        self._left -= n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+def _split_byte_ranges(path: str, parts: int) -> list[tuple[int, int]]:
+    # split the file body (after the header) into roughly equal ranges that start on a line boundary
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        starts = [f.tell()]
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, starts[-1]))
+            f.readline()
+            starts.append(f.tell())
+    ends = starts[1:] + [size]
+    return [(s, e) for s, e in zip(starts, ends) if e > s]
+
+def _load_actor_chunk(pg, chunk_df: pd.DataFrame, label: str) -> int:
+    # clean chunk - rename columns to matcg dw
+    chunk_df = chunk_df.rename(columns={
+        "nconst": "actor_id_source",
+        "primaryName": "name",
+        "birthYear": "birth_year",
+        "primaryProfession": "primary_profession"
+    })
+
+    # Drop rows where the 'name' is null -> violates NOT NULL constraint in dw
+    original_count = len(chunk_df)
+    chunk_df = chunk_df.dropna(subset=['name'])
+    dropped_rows = original_count - len(chunk_df)
+    if dropped_rows > 0:
+        print(f"    Dropped {dropped_rows} rows from {label} due to missing actor name.")
+    # Apply cleaning functions (vectorized - no per-row python calls)
+    chunk_df['primary_profession'] = chunk_df['primary_profession'].str.slice(0, 255)
+    chunk_df = chunk_df[["actor_id_source", "name", "birth_year", "primary_profession"]]
+    # one row per nconst (last wins) -- a repeated key in the same INSERT ... ON CONFLICT
+    # would make Postgres try to update the same row twice
+    chunk_df = chunk_df.drop_duplicates(subset="actor_id_source", keep="last")
+
+    # bulk upsert
+    with pg.connect() as conn:
+        with conn.begin() as trans:
+
+            conn.execute(text(f"SET search_path TO {DW_SCHEMA}"))
+            conn.execute(_ASYNC_COMMIT_SQL)
+
+            conn.execute(text("""
+                CREATE TEMPORARY TABLE temp_actors (
+                    actor_id_source VARCHAR(100),
+                    name VARCHAR(255),
+                    birth_year INT,
+                    primary_profession VARCHAR(255)
+                ) ON COMMIT DROP;
+            """))
+
+            #copy
+            _copy_df(conn, chunk_df, "temp_actors")
+
+            #upsert chunk
+            conn.execute(text("""
+                INSERT INTO Dim_Actor (Actor_ID_Source, Name, Birth_Year, Primary_Profession)
+                SELECT
+                    actor_id_source,
+                    name,
+                    birth_year,
+                    primary_profession
+                FROM temp_actors
+                ON CONFLICT (Actor_ID_Source) DO UPDATE SET
+                    Name = EXCLUDED.Name,
+                    Birth_Year = EXCLUDED.Birth_Year,
+                    Primary_Profession = EXCLUDED.Primary_Profession
+                -- re-runs: actors that are already loaded unchanged aren't rewritten
+                WHERE (Dim_Actor.Name, Dim_Actor.Birth_Year, Dim_Actor.Primary_Profession)
+                      IS DISTINCT FROM (EXCLUDED.Name, EXCLUDED.Birth_Year, EXCLUDED.Primary_Profession);
+            """))
+
+    return len(chunk_df)
+
+def _load_actor_range(worker: int, start: int, end: int, columns: list[str]) -> int:
+    # runs in its own process: own engine/connections, own slice of the file
+    pg = create_engine(PG_URL)
+    use_cols = ["nconst", "primaryName", "birthYear", "primaryProfession"]
+    rows_processed = 0
+    chunk_num = 0
 
-def _coerce_date(val) -> date | None:
-    if val is None:
-        return None
-    try:
-         
-        if isinstance(val, (int, float)) and 1800 < val < 2100:
-             # Handle integer years
-            return date(int(val), 1, 1)
-        
-        dt = pd.to_datetime(val, errors="coerce")
-        if pd.isna(dt):
-            m = re.search(r"(\d{4})", str(val))
-            if m:
-                return date(int(m.group(1)), 1, 1)
-            return None
-        return dt.date()
-    except Exception:
-        return None
-
-#date
-def _date_to_sk(d: date) -> int:
-    # YYYYMMDD as int
-    return d.year * 10000 + d.month * 100 + d.day
-
-def _safe_float(v, lo=None, hi=None):
-    try:
-        f = float(v)
-        if lo is not None and f < lo: return None
-        if hi is not None and f > hi: return None
-        return f
-    except Exception:
-        return None
-    
-def _safe_int(v):
-        try:
-            return int(float(v))
-        except Exception:
-            return None 
-        
-def _clean_currency(val) -> float | None:
-    """Removes $ and , from currency strings and converts to float."""
-    if pd.isna(val):
-        return None
     try:
-        s = str(val).replace("$", "").replace(",", "")
-        return _safe_float(s)
-    except Exception:
-        return None
-    
-def load_dw_from_imdb_actors():
+        # read_csv doesn't close a file object it was handed, so the with closes the range
+        with io.BufferedReader(_ByteRange(IMDB_PATH, start, end)) as reader:
+            # Read this worker's part of the TSV in chunks of 100,000
+            chunk_iter = pd.read_csv(
+                reader,
+                sep='\t',        # Tab-separated file
+                header=None,
+                names=columns,   # the header line only exists in the first range, so pass it in
+                na_values='\\N',   # IMDB uses '\N' for NULL
+                usecols=use_cols,
+                engine='c',
+                # birthYear as nullable Int16: 2 bytes a row instead of float64, and the COPY
+                # buffer gets "1970" instead of a float that has to be re-formatted
+                dtype={"nconst": "string", "primaryName": "string", "birthYear": "Int16",
+                       "primaryProfession": "string"},
+                chunksize=100000
+            )
+
+            for chunk_df in chunk_iter:
+                chunk_num += 1
+                label = f"worker {worker} chunk {chunk_num}"
+                try:
+                    rows_in_chunk = _load_actor_chunk(pg, chunk_df, label)
+                    rows_processed += rows_in_chunk
+                    print(f"  Processed {label} ({rows_in_chunk} rows). Worker total: {rows_processed}")
+                except Exception as e:
+                    print(f"Error processing {label}: {e}")
+                    print("Skipping this chunk and continuing...")
+                    continue
+
+    except Exception as e:
+        print(f"Fatal error reading CSV at {IMDB_PATH} (worker {worker}): {e}")
+    finally:
+        pg.dispose()
+
+    return rows_processed
+
+def load_dw_from_imdb_actors(rebuild_indexes: bool = False, workers: int | None = None):
     """
     Loads actor data from the large IMDB names.basics.tsv file.
-    It reads the file in chunks and performs a bulk "upsert"
-    into Dim_Actor for high performance.
+    The file is split into byte ranges and each worker process reads
+    its range in chunks and performs a bulk "upsert" into Dim_Actor
+    for high performance.
+    With rebuild_indexes (--full-refresh), secondary Dim_Actor indexes
+    are dropped for the load and rebuilt once at the end.
     """
     print("\nStarting IMDB Actor (TSV) load...")
     if not IMDB_PATH or not os.path.exists(IMDB_PATH):
@@ -75,103 +161,47 @@ def load_dw_from_imdb_actors():
         return
 
     pg = create_engine(PG_URL)
-    
-    # relevant columns
-    use_cols = ["nconst", "primaryName", "birthYear", "primaryProfession"]
+
+    # half the cores -- leave room for the postgres backends doing the upserts
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
     total_rows_processed = 0
-    chunk_num = 0
 
     try:
-        # Read the large TSV file in chunks of 100,000
-        chunk_iter = pd.read_csv(
-            IMDB_PATH,
-            sep='\t',        # Tab-separated file
-            na_values='\\N',   # IMDB uses '\N' for NULL
-            usecols=use_cols,
-            chunksize=100000
-        )
-
-        for chunk_df in chunk_iter:
-            chunk_num += 1
-            
-            # clean chunk - rename columns to matcg dw
-            chunk_df = chunk_df.rename(columns={
-                "nconst": "actor_id_source",
-                "primaryName": "name",
-                "birthYear": "birth_year",
-                "primaryProfession": "primary_profession"
-            })
-
-            
-
-            # Drop rows where the 'name' is null -> violates NOT NULL constraint in dw
-            original_count = len(chunk_df)
-            chunk_df = chunk_df.dropna(subset=['name'])
-            dropped_rows = original_count - len(chunk_df)
-            if dropped_rows > 0:
-                print(f"    Dropped {dropped_rows} rows from chunk {chunk_num} due to missing actor name.")
-            # Apply cleaning functions
-            chunk_df['primary_profession'] = chunk_df['primary_profession'].apply(
-                lambda x: str(x)[:255] if pd.notna(x) else None
-            )
-
-            # bulk upsert
-            try:
-                with pg.connect() as conn:
-                    with conn.begin() as trans:
-
-                        conn.execute(text(f"SET search_path TO {DW_SCHEMA}"))
-
-                        raw_conn = conn.connection
-                        
-                        conn.execute(text("""
-                            CREATE TEMPORARY TABLE temp_actors (
-                                actor_id_source VARCHAR(100),
-                                name VARCHAR(255),
-                                birth_year INT,
-                                primary_profession VARCHAR(255)
-                            ) ON COMMIT DROP;
-                        """))
-
-                        # Create an in-memory "file" -temp
-                        buffer = io.StringIO()
-                        chunk_df.to_csv(buffer, index=False, header=False, sep='\t', na_rep='\\N', float_format='%.0f')
-                        buffer.seek(0) # Rewind the "file" to the beginning
-
-                        #copy
-                        with raw_conn.cursor() as cursor:
-                            cursor.copy_expert(
-                                "COPY temp_actors FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t', NULL '\\N')",
-                                buffer
-                            )
-                        
-                        #upsert chunk
-                        result = conn.execute(text("""
-                            INSERT INTO Dim_Actor (Actor_ID_Source, Name, Birth_Year, Primary_Profession)
-                            SELECT
-                                actor_id_source,
-                                name,
-                                birth_year,
-                                primary_profession
-                            FROM temp_actors
-                            ON CONFLICT (Actor_ID_Source) DO UPDATE SET
-                                Name = EXCLUDED.Name,
-                                Birth_Year = EXCLUDED.Birth_Year,
-                                Primary_Profession = EXCLUDED.Primary_Profession;
-                        """))
-                        
-                        rows_in_chunk = len(chunk_df)
-                        total_rows_processed += rows_in_chunk
-                        print(f"  Processed chunk {chunk_num} ({rows_in_chunk} rows). Total processed: {total_rows_processed}")
-            
-            except Exception as e:
-                print(f"Error processing chunk {chunk_num}: {e}")
-                print("Skipping this chunk and continuing...")
-                continue
-
+        with open(IMDB_PATH, encoding="utf-8") as f:
+            columns = f.readline().rstrip("\r\n").split("\t")
+        ranges = _split_byte_ranges(IMDB_PATH, workers)
     except Exception as e:
         print(f"Fatal error reading CSV at {IMDB_PATH}: {e}")
         return
 
+    # the workers write on their own connections, so the drop and the rebuild are two
+    # separate transactions here (the rebuild runs even if some worker failed)
+    dropped_indexes = []
+    if rebuild_indexes:
+        with pg.begin() as c:
+            dropped_indexes = _drop_secondary_indexes(c, "dim_actor")
+    if dropped_indexes:
+        print(f"  Dropped {len(dropped_indexes)} secondary index(es) on Dim_Actor for the load.")
+
+    try:
+        print(f"  Loading {len(ranges)} range(s) with {workers} worker process(es)...")
+        # nconst is unique per file, so the ranges upsert disjoint keys and don't block each other
+        # spawn, not fork: main.py may run this next to the TMDb loader's threads, and forking a
+        # process with live threads can leave the children stuck on copied locks
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_load_actor_range, i + 1, start, end, columns)
+                       for i, (start, end) in enumerate(ranges)]
+            for fut in futures:
+                try:
+                    total_rows_processed += fut.result()
+                except Exception as e:
+                    print(f"Worker failed: {e}")
+    finally:
+        # always put the indexes back, even if the load stopped partway
+        if dropped_indexes:
+            with pg.begin() as c:
+                _recreate_indexes(c, dropped_indexes)
+            print(f"  Rebuilt {len(dropped_indexes)} secondary index(es) on Dim_Actor.")
+
     print("IMDB Actor (TSV) load complete.")
-    print(f"  Total rows processed from file: {total_rows_processed}")
\ No newline at end of file
+    print(f"  Total rows processed from file: {total_rows_processed}")
@@ -1,224 +1,427 @@
 import pandas as pd
-import os, re, io, requests, time
+import re, requests, time, threading, sqlite3
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from sqlalchemy import create_engine, text
-from datetime import datetime, date
+from loaders._common import DW_SCHEMA, _ASYNC_COMMIT_SQL, _safe_float_series, _safe_int_series, _coerce_date_series, _copy_df
 from config import PG_URL, TMDB_API_KEY
 
-DW_SCHEMA = "dw_books_movies" #our star schema where the data will be loaded
-
 #endpoints
 FIND_URL = "https://api.themoviedb.org/3/find/{external_id}"
 MOVIE_URL = "https://api.themoviedb.org/3/movie/{tmdb_id}"
 PERSON_URL = "https://api.themoviedb.org/3/person/{person_id}"
 
-def _derive_movie_id_source_from_imdb(imdb_id: str | None) -> str | None:
-    #movie natural key from IMDb so we can upsert easily
-    if not imdb_id or not isinstance(imdb_id, str):
+# optional tt/nm prefix + digits, so an id is normalized with one match instead of startswith/zfill chains
+_PREFIX_RE = re.compile(r"(tt|nm)?(\d+)")
+_FIND_PREFIX = {'movie': 'tt', 'person': 'nm'}
+
+# the loaders are bound by API latency, not CPU, so the fetches fan out over threads
+MAX_WORKERS = 16
+FETCH_BATCH_SIZE = 1000 #items submitted to the pool at a time (bounds memory)
+MAX_REQUESTS_PER_SEC = 40 #TMDb allows ~50/s, stay a bit under it
+UPDATE_BATCH_SIZE = 10_000 #fetched rows staged per COPY + UPDATE ... FROM
+CACHE_TTL_DAYS = 30 #movies/actors fetched more recently than this are not asked for again
+PROGRESS_EVERY = 1000 #items between progress lines (stdout is shared by all fetch threads)
+HTTP_CACHE_PATH = "tmdb_cache.sqlite" #successful GETs are kept on disk so re-runs skip the API
+HTTP_CACHE_EXPIRE_SECS = 7 * 24 * 3600
+
+# one pooled session for every thread: keeps the TCP/TLS connections alive between calls
+# transient errors (429/5xx, dropped connections) are retried by urllib3 with backoff,
+# honoring Retry-After, instead of a hand-rolled loop in every fetch function
+_SESSION = requests.Session()
+_RETRY = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=_RETRY)
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+class _RateLimiter:
+    # sliding one-second window shared by all worker threads (replaces the fixed sleep per item)
+    def __init__(self, per_sec: int):
+        self.per_sec = per_sec
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 1.0:
+                    self._calls.popleft()
+                if len(self._calls) < self.per_sec:
+                    self._calls.append(now)
+                    return
+                sleep_for = 1.0 - (now - self._calls[0])
+            time.sleep(sleep_for)
+
+_RATE_LIMITER = _RateLimiter(MAX_REQUESTS_PER_SEC)
+
+class _ResponseCache:
+    # tiny on-disk cache of 200 response bodies keyed by url + sorted params (minus the api key)
+    def __init__(self, path: str, expire_after: int):
+        self.expire_after = expire_after
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body BLOB NOT NULL, fetched_at REAL NOT NULL)")
+        # expired rows are never served again, drop them once per run so the file doesn't keep growing
+        self._db.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - expire_after,))
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params) -> str:
+        return url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()) if k != "api_key")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT body, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row and time.time() - row[1] < self.expire_after:
+            return row[0]
         return None
-    m = re.search(r"tt?(\d+)", imdb_id.strip())
-    return m.group(1) if m else None
 
-def _coerce_date(val) -> date | None:
-    if val is None:
-        return None
-    try:
-        if isinstance(val, (int, float)) and 1800 < val < 2100:
-             # Handle integer years
-            return date(int(val), 1, 1)
-        
-        dt = pd.to_datetime(val, errors="coerce")
-        if pd.isna(dt):
-            m = re.search(r"(\d{4})", str(val))
-            if m:
-                return date(int(m.group(1)), 1, 1)
-            return None
-        return dt.date()
-    except Exception:
+    def put(self, key, body: bytes):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, body, time.time()))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def _get_cache() -> _ResponseCache:
+    # opened on first use so importing the module doesn't create the file
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = _ResponseCache(HTTP_CACHE_PATH, HTTP_CACHE_EXPIRE_SECS)
+        return _cache
+
+def clear_tmdb_cache():
+    _get_cache().clear()
+    print("TMDb HTTP cache cleared.")
+
+def _tmdb_get(url, params, use_cache=True):
+    # cache hits come back as a plain 200 Response and skip both the network and the rate limiter
+    # use_cache=False always goes to the API (the fresh response still replaces the cached one)
+    cache = _get_cache()
+    key = cache.key(url, params)
+    body = cache.get(key) if use_cache else None
+    if body is not None:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        return response
+
+    _RATE_LIMITER.wait()
+    response = _SESSION.get(url, params=params, timeout=15)
+    if response.status_code == 200:
+        cache.put(key, response.content)
+    return response
+
+def _create_dw_engine():
+    # search_path is set once per connection at connect time, not re-sent in every transaction
+    return create_engine(PG_URL, connect_args={"options": f"-csearch_path={DW_SCHEMA}"})
+
+def _fetch_all(fetch, items):
+    # runs fetch(*item) on the thread pool, FETCH_BATCH_SIZE items at a time, yielding (item, result)
+    # in order; items can be a streamed DB result, only one batch is pulled from it at a time
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        while batch := list(islice(items, FETCH_BATCH_SIZE)):
+            yield from zip(batch, pool.map(lambda item: fetch(*item), batch))
+
+def _imdb_external_id(external_id, find_type):
+    # "123" / "tt123" -> "tt0000123" for movies (nm for people); None if empty or the wrong kind of id
+    m = _PREFIX_RE.fullmatch(str(external_id or ""))
+    if not m:
         return None
-
-#date
-def _date_to_sk(d: date) -> int:
-    # YYYYMMDD as int
-    return d.year * 10000 + d.month * 100 + d.day
-
-def _safe_float(v, lo=None, hi=None):
-    try:
-        f = float(v)
-        if lo is not None and f < lo: return None
-        if hi is not None and f > hi: return None
-        return f
-    except Exception:
+    prefix = _FIND_PREFIX[find_type]
+    if m.group(1) not in (None, prefix):
         return None
-    
-def _safe_int(v):
-        try:
-            return int(float(v)) 
-        except Exception:
-            return None 
+    return f"{prefix}{m.group(2).zfill(7)}"
 
-def _clean_currency(val) -> float | None:
-    """Removes $ and , from currency strings and converts to float."""
-    if pd.isna(val):
-        return None
-    try:
-        s = str(val).replace("$", "").replace(",", "")
-        return _safe_float(s)
-    except Exception:
-        return None
-    
-    
 def _get_tmdb_id(external_id, find_type): # find_type is 'movie' or 'person'
     """
-    Finds the TMDb ID from an IMDb ID, with retries and strict type checking.
+    Finds the TMDb ID from an IMDb ID, with strict type checking (retries happen in the session).
     """
+    original_id = external_id
+    external_id = _imdb_external_id(external_id, find_type)
     if not external_id:
-        print("  _get_tmdb_id: Received empty external_id.")
         return None
 
-    original_id = external_id
-
-    #check if actor or movie
-    if find_type == 'movie':
-        if external_id.startswith('nm'):
-            print(f"  _get_tmdb_id: ID {external_id} is a PERSON ID, but we are looking for a MOVIE. Skipping.")
-            return None 
-        if not external_id.startswith('tt'):
-            external_id = f"tt{external_id.zfill(7)}"
-            
-    elif find_type == 'person':
-        if external_id.startswith('tt'):
-            print(f"  _get_tmdb_id: ID {external_id} is a MOVIE ID, but we are looking for a PERSON. Skipping.")
-            return None 
-        if not external_id.startswith('nm'):
-            external_id = f"nm{external_id.zfill(7)}"
-   
-
     params = {'api_key': TMDB_API_KEY, 'external_source': 'imdb_id'}
     url_to_call = FIND_URL.format(external_id=external_id)
 
-    for attempt in range(3):
-        try:
-            print(f"    _get_tmdb_id Attempt {attempt+1}: Calling URL: {url_to_call}")
-            response = requests.get(
-                url_to_call,
-                params=params,
-                timeout=15
-            )
-            print(f"    _get_tmdb_id Response Status: {response.status_code}")
-            print(f"    _get_tmdb_id Response Text (first 200 chars): {response.text[:200]}")
-
-            response.raise_for_status()
-            data = response.json()
-
-            #seachr for movie or person
-            if find_type == 'movie':
-                results = data.get('movie_results')
-            else: 
-                results = data.get('person_results')
-           
-
-            if results:
-                tmdb_id = results[0].get('id')
-                print(f"    _get_tmdb_id Success: Found TMDb ID {tmdb_id} for {original_id}")
-                return tmdb_id
-            else:
-                print(f"    _get_tmdb_id Failed: API returned success, but no {find_type} results found for {original_id}")
-                return None
-
-        except requests.exceptions.RequestException as e:
-            print(f"  Attempt {attempt + 1} failed for {original_id}: {e}")
-            if attempt < 2:
-                wait_time = (attempt + 1) * 5
-                print(f"  Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                print(f"  Max retries reached for {original_id}. Skipping.")
-        except requests.exceptions.JSONDecodeError as e:
-             print(f"  Attempt {attempt + 1} failed for {original_id}: Could not decode JSON response. Error: {e}")
-             return None
-
-    print(f"  _get_tmdb_id Failed: All retries failed for {original_id}.")
-    return None
+    try:
+        response = _tmdb_get(url_to_call, params)
+        response.raise_for_status()
+        data = response.json()
+    except requests.exceptions.JSONDecodeError as e:
+        print(f"  _get_tmdb_id: could not decode JSON for {original_id}: {e}")
+        return None
+    except requests.exceptions.RequestException as e:
+        # the session already retried transient failures
+        print(f"  _get_tmdb_id failed for {original_id}: {e}")
+        return None
+
+    #seachr for movie or person
+    results = data.get('movie_results' if find_type == 'movie' else 'person_results')
+    return results[0].get('id') if results else None
+
+def _get_movie_details(movie_id, use_cache=True):
+    # MOVIES > Details; movie_id can be a TMDb id or an IMDb "tt..." id. None on 404
+    response = _tmdb_get(MOVIE_URL.format(tmdb_id=movie_id), {'api_key': TMDB_API_KEY}, use_cache)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+_FETCH_FAILED = object() #request error, as opposed to None for "TMDb doesn't have it"
 
-def load_dynamic_movie_data():
+def _fetch_movie(movie_sk, movie_id_source, use_cache=True):
+    # TMDb movie details for one Dim_Movie row (runs on a pool thread),
+    # None if TMDb doesn't know the movie, _FETCH_FAILED if the request itself failed
+    # (only the details honour use_cache -- the IMDb -> TMDb id from /find doesn't go stale)
+    try:
+        # /movie/ accepts the IMDb id directly: one call instead of /find + /movie
+        imdb_id = _imdb_external_id(movie_id_source, 'movie')
+        if imdb_id:
+            data = _get_movie_details(imdb_id, use_cache)
+            if data and data.get('id'):
+                return data
+
+        # fall back to resolving the TMDb id first
+        tmdb_id = _get_tmdb_id(movie_id_source, 'movie') # Use 'movie' type
+        if not tmdb_id:
+            return None
+        return _get_movie_details(tmdb_id, use_cache)
+    except Exception as e:
+        print(f"  Failed to process Movie_SK {movie_sk}. Skipping. Error: {e}")
+    return _FETCH_FAILED
+
+_MOVIE_UPDATE_COLS = ["sk", "src", "rdate", "budget", "revenue", "mavg", "mrc"]
+
+def _apply_movie_updates(pg, rows) -> tuple[int, int]:
+    # one transaction per batch: COPY the fetched values into a temp table, then set-based updates
+    # NOTE: the old per-movie loop fetched the details but never wrote them. What gets written here:
+    #   Dim_Movie            - Release_Date/Release_Year, only where the sources left them NULL
+    #   Fact_Book_Adaptation - Production_Budget, Movie_Average_Rating, Movie_Review_Count are
+    #                          overwritten by TMDb values when present; Box_Office_Gross only when
+    #                          still NULL (the box office CSV wins); Profit/ROI recomputed from those
+    # raw API values are cast per column here, not per movie in the fetch loop
+    df = pd.DataFrame(rows, columns=_MOVIE_UPDATE_COLS)
+    df["rdate"] = _coerce_date_series(df["rdate"].mask(df["rdate"] == ""))
+    # TMDb uses 0 for unknown budget/revenue
+    df["budget"] = _safe_float_series(df["budget"], lo=1)
+    df["revenue"] = _safe_float_series(df["revenue"], lo=1)
+    df["mavg"] = _safe_float_series(df["mavg"], 0, 10)
+    df["mrc"] = _safe_int_series(df["mrc"])
+    with pg.begin() as c:
+        c.execute(_ASYNC_COMMIT_SQL)
+        c.execute(text("""
+            CREATE TEMPORARY TABLE temp_movie_updates (
+                -- same precision as the fact columns, so the change checks below compare like with like
+                sk INT, src TEXT, rdate DATE, budget DECIMAL(18, 2), revenue DECIMAL(18, 2), mavg DECIMAL(4, 2), mrc INT
+            ) ON COMMIT DROP;
+        """))
+        _copy_df(c, df, "temp_movie_updates")
+
+        # every movie TMDb answered for (misses included) is remembered, so re-runs skip it until the TTL
+        c.execute(text("""
+            INSERT INTO Tmdb_Movie_Cache (Movie_ID_Source, Fetched_At)
+            SELECT DISTINCT src, now()
+            FROM temp_movie_updates
+            WHERE src IS NOT NULL
+            ON CONFLICT (Movie_ID_Source) DO UPDATE SET
+                Fetched_At = EXCLUDED.Fetched_At
+        """))
+
+        # only fill in release dates the sources didn't have
+        movies_updated = c.execute(text("""
+            UPDATE Dim_Movie m SET
+                Release_Date = t.rdate,
+                Release_Year = EXTRACT(YEAR FROM t.rdate)::INT
+            FROM temp_movie_updates t
+            WHERE m.Movie_SK = t.sk AND m.Release_Date IS NULL AND t.rdate IS NOT NULL
+        """)).rowcount
+
+        # box office CSV gross wins over TMDb revenue, TMDb budget/ratings refresh the measures
+        # (new values worked out once in the subquery, then compared/assigned below)
+        facts_updated = c.execute(text("""
+            UPDATE Fact_Book_Adaptation f SET
+                Production_Budget    = n.budget,
+                Box_Office_Gross     = n.gross,
+                Profit               = n.gross - n.budget,
+                -- junk budgets (1, 10, ...) give ROIs that don't fit DECIMAL(10,2) -> NULL, not an error
+                ROI                  = CASE WHEN ABS((n.gross - n.budget) / NULLIF(n.budget, 0) * 100) < 99999999.99
+                                            THEN (n.gross - n.budget) / NULLIF(n.budget, 0) * 100 END,
+                Movie_Average_Rating = n.mavg,
+                Movie_Review_Count   = n.mrc
+            FROM (
+                SELECT cur.Book_SK, cur.Movie_SK,
+                       COALESCE(t.budget, cur.Production_Budget) AS budget,
+                       COALESCE(cur.Box_Office_Gross, t.revenue) AS gross,
+                       COALESCE(t.mavg, cur.Movie_Average_Rating) AS mavg,
+                       COALESCE(t.mrc, cur.Movie_Review_Count) AS mrc
+                FROM temp_movie_updates t
+                JOIN Fact_Book_Adaptation cur ON cur.Movie_SK = t.sk
+            ) n
+            WHERE f.Book_SK = n.Book_SK AND f.Movie_SK = n.Movie_SK
+              -- re-runs: facts the API wouldn't change aren't rewritten (ROI follows from these)
+              AND (f.Production_Budget, f.Box_Office_Gross, f.Profit, f.Movie_Average_Rating, f.Movie_Review_Count)
+                  IS DISTINCT FROM (n.budget, n.gross, n.gross - n.budget, n.mavg, n.mrc)
+        """)).rowcount
+    return movies_updated, facts_updated
+
+def _try_apply_movie_updates(pg, rows) -> tuple[int, int]:
+    # a bad batch is rolled back and logged, the load carries on with the next one
+    try:
+        return _apply_movie_updates(pg, rows)
+    except Exception as e:
+        print(f"  !!! Failed to write batch of {len(rows)} movies (Movie_SK {rows[0][0]}..{rows[-1][0]}). Skipping. Error: {e}")
+        return 0, 0
+
+def load_dynamic_movie_data(refresh_all: bool = False):
     print("\nStarting Dynamic Movie Data (API) load...")
     if not TMDB_API_KEY or TMDB_API_KEY == "PASTE_YOUR_API_KEY_HERE":
         print("Error: TMDB_API_KEY not set. Skipping load.")
         return
 
-    pg = create_engine(PG_URL)
-    movies_to_check = []
+    pg = _create_dw_engine()
     movies_updated = 0
     facts_updated = 0
 
-    #get list of movies to chekc
-    try:
-        print("Connecting to database to fetch movies...")
-        with pg.connect() as c: 
-            result = c.execute(text(f"SELECT movie_sk, movie_id_source FROM {DW_SCHEMA}.\"dim_movie\""))        
-            movies_to_check = result.fetchall()
-        print(f"Found {len(movies_to_check)} movies in dim_movie to update.")
-    except Exception as e:
-         print(f"!!! DATABASE ERROR fetching movies: {e}")
-         return # Stop if we can't get the movie list
-    
-    #process
+    #process - the movie list is streamed from a server-side cursor straight into the API pool,
+    #results come back here in order and are staged, then written UPDATE_BATCH_SIZE at a time
     processed_count = 0
-    with pg.connect() as c: 
-        for movie_sk, movie_id_source in movies_to_check:
+    pending = []
+    with pg.connect() as c:
+        try:
+            print("Connecting to database to stream movies...")
+            # re-runs only ask for movies that still have something the API can fill in and
+            # weren't asked about within CACHE_TTL_DAYS -- TMDb has no budget/revenue for many
+            # titles, so "still missing" alone would re-fetch those on every run
+            # (refresh_all re-fetches everything, e.g. to pick up new ratings)
+            query = f"""
+                SELECT m.movie_sk, m.movie_id_source
+                FROM {DW_SCHEMA}.dim_movie m
+                LEFT JOIN {DW_SCHEMA}.tmdb_movie_cache tc ON tc.movie_id_source = m.movie_id_source
+                WHERE :refresh_all
+                   OR ((tc.fetched_at IS NULL OR tc.fetched_at <= now() - make_interval(days => :ttl))
+                       AND (m.release_date IS NULL
+                            OR EXISTS (
+                                SELECT 1 FROM {DW_SCHEMA}.fact_book_adaptation f
+                                WHERE f.movie_sk = m.movie_sk
+                                  AND (f.production_budget IS NULL OR f.box_office_gross IS NULL
+                                       OR f.movie_average_rating IS NULL OR f.movie_review_count IS NULL)
+                            )))
+            """
+            movies_to_check = c.execution_options(stream_results=True).execute(
+                text(query), {"refresh_all": refresh_all, "ttl": CACHE_TTL_DAYS}
+            ).yield_per(FETCH_BATCH_SIZE)
+        except Exception as e:
+            print(f"!!! DATABASE ERROR fetching movies: {e}")
+            return # Stop if we can't get the movie list
+
+        # refresh_all also skips the on-disk response cache, otherwise it would re-read week-old data
+        fetch = lambda sk, src: _fetch_movie(sk, src, use_cache=not refresh_all)
+        for (movie_sk, movie_id_source), data in _fetch_all(fetch, movies_to_check):
             processed_count += 1
-            
-            #Find TMDb ID
-            tmdb_id = _get_tmdb_id(movie_id_source, 'movie') # Use 'movie' type
-            if not tmdb_id:
-                print(f"  Skipping Movie_SK {movie_sk} - TMDb ID not found or was not a movie.")
-                continue
-
-            #Call MOVIES > Details endpoint
-            try:
-                data = None
-                for attempt in range(3):
-                    try:
-                        params = {'api_key': TMDB_API_KEY}
-                        response = requests.get(
-                            MOVIE_URL.format(tmdb_id=tmdb_id), 
-                            params=params, 
-                            timeout=15
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        break 
-                    except requests.exceptions.RequestException as e:
-                        print(f"  Attempt {attempt + 1} failed for Movie_SK {movie_sk}: {e}")
-                        if attempt < 2:
-                            wait_time = (attempt + 1) * 5
-                            print(f"  Retrying in {wait_time} seconds...")
-                            time.sleep(wait_time)
-                        else:
-                            raise 
-                
-                if data is None:
-                    print(f"  Skipping Movie_SK {movie_sk} after failed retries.")
-                    continue 
-                
-                
-                with c.begin(): 
-                    c.execute(text(f"SET search_path TO {DW_SCHEMA}"))
-
-                time.sleep(0.2) 
-                
-            except Exception as e: 
-                print(f"  Failed to process Movie_SK {movie_sk} after 3 attempts. Skipping. Error: {e}")
-                continue
-            
-            if processed_count % 100 == 0:
-                print(f"  ...processed {processed_count}/{len(movies_to_check)} movies (updated {facts_updated} fact rows)...")
+            if data is None:
+                # TMDb doesn't have it: an all-NULL row changes nothing but still marks it fetched
+                pending.append((movie_sk, movie_id_source, None, None, None, None, None))
+            elif data is not _FETCH_FAILED:
+                pending.append((
+                    movie_sk,
+                    movie_id_source,
+                    data.get('release_date'),
+                    data.get('budget'),
+                    data.get('revenue'),
+                    data.get('vote_average'),
+                    data.get('vote_count'),
+                ))
+
+            if len(pending) >= UPDATE_BATCH_SIZE:
+                m, f = _try_apply_movie_updates(pg, pending)
+                movies_updated += m
+                facts_updated += f
+                pending = []
+
+            if processed_count % PROGRESS_EVERY == 0:
+                print(f"  ...processed {processed_count} movies (updated {facts_updated} fact rows)...")
+
+    if pending:
+        m, f = _try_apply_movie_updates(pg, pending)
+        movies_updated += m
+        facts_updated += f
 
     print("Dynamic Movie Data load complete.")
     print(f"  Total movies processed: {processed_count}")
+    print(f"  Total movies given a release date: {movies_updated}")
     print(f"  Total fact rows updated: {facts_updated}")
 
 
+def _fetch_actor(actor_sk, actor_id_source, tmdb_id=None):
+    # TMDb person details for one Dim_Actor row (runs on a pool thread), None if not found/failed
+    # tmdb_id comes from an expired cache row when we have one -- the id doesn't change, so no /find
+    tmdb_id = tmdb_id or _get_tmdb_id(actor_id_source, 'person')
+
+    if not tmdb_id:
+        return None
+
+    try:
+        response = _tmdb_get(PERSON_URL.format(person_id=tmdb_id), {'api_key': TMDB_API_KEY})
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"  Failed to process Actor_SK {actor_sk} (IMDb: {actor_id_source}). Skipping. Error: {e}")
+    return None
+
+def _apply_actor_updates(pg, rows) -> int:
+    # COPY the fetched actors into a temp table, then one UPDATE ... FROM for the batch
+    # and one upsert into the cache so the next run can skip them
+    df = pd.DataFrame(rows, columns=["sk", "src", "tmdb_id", "pop"])
+    df["tmdb_id"] = _safe_int_series(df["tmdb_id"])
+    df["pop"] = _safe_float_series(df["pop"])
+    with pg.begin() as c:
+        c.execute(_ASYNC_COMMIT_SQL)
+        c.execute(text("""
+            CREATE TEMPORARY TABLE temp_actor_updates (
+                sk INT, src TEXT, tmdb_id INT, pop DECIMAL(10, 2)
+            ) ON COMMIT DROP;
+        """))
+        _copy_df(c, df, "temp_actor_updates")
+        updated = c.execute(text("""
+            UPDATE Dim_Actor a SET
+                Popularity_Score = t.pop
+            FROM temp_actor_updates t
+            WHERE a.Actor_SK = t.sk AND a.Popularity_Score IS DISTINCT FROM t.pop
+        """)).rowcount
+        c.execute(text("""
+            INSERT INTO Tmdb_Actor_Cache (Actor_ID_Source, Tmdb_ID, Popularity, Fetched_At)
+            SELECT DISTINCT ON (src) src, tmdb_id, pop, now()
+            FROM temp_actor_updates
+            ORDER BY src
+            ON CONFLICT (Actor_ID_Source) DO UPDATE SET
+                Tmdb_ID = EXCLUDED.Tmdb_ID,
+                Popularity = EXCLUDED.Popularity,
+                Fetched_At = EXCLUDED.Fetched_At
+        """))
+    return updated
+
+def _try_apply_actor_updates(pg, rows) -> int:
+    # same as the movies: log the failed batch and keep going
+    try:
+        return _apply_actor_updates(pg, rows)
+    except Exception as e:
+        print(f"  !!! Failed to write batch of {len(rows)} actors (Actor_SK {rows[0][0]}..{rows[-1][0]}). Skipping. Error: {e}")
+        return 0
 
 def load_dynamic_actor_data():
     print("\nStarting Dynamic Actor Data (API) load...")
@@ -226,94 +429,50 @@ def load_dynamic_actor_data():
         print("Error: TMDB_API_KEY not set. Skipping load.")
         return
 
-    pg = create_engine(PG_URL)
-    actors_to_check = []
+    pg = _create_dw_engine()
     actors_updated = 0
 
-    try: 
-        print("Connecting to database to fetch actors...")
-        with pg.connect() as c:
+    #API calls run on the pool fed by a server-side cursor, popularity scores are staged
+    #and written UPDATE_BATCH_SIZE at a time (mirror of the movie loader)
+    processed_count = 0
+    pending = []
+    with pg.connect() as c:
+        try: 
+            print("Connecting to database to stream actors...")
+            # actors resolved within CACHE_TTL_DAYS (Tmdb_Actor_Cache, see the schema file) are skipped;
+            # stale cache rows still carry the resolved TMDb id, only never-seen actors need /find
             query = text(f"""
                 SELECT DISTINCT
                     a.Actor_SK,
-                    a.Actor_ID_Source
+                    a.Actor_ID_Source,
+                    tc.Tmdb_ID
                 FROM {DW_SCHEMA}.Dim_Actor a
                 JOIN {DW_SCHEMA}.Bridge_Movie_Actor b ON a.Actor_SK = b.Actor_SK
+                LEFT JOIN {DW_SCHEMA}.Tmdb_Actor_Cache tc ON tc.Actor_ID_Source = a.Actor_ID_Source
                 WHERE a.Actor_ID_Source IS NOT NULL
+                  AND (tc.Fetched_At IS NULL OR tc.Fetched_At <= now() - make_interval(days => :ttl))
             """)
-            result = c.execute(query)
-            actors_to_check = result.fetchall()
-            print(f"Found {len(actors_to_check)} linked actors in Bridge_Movie_Actor to update.")
-    except Exception as e: 
-         print(f"!!! DATABASE ERROR fetching actors: {e}")
-         return 
-
-    processed_count = 0
-    with pg.connect() as c: # Re-establish connection for the loop
-        for actor_sk, actor_id_source in actors_to_check:
+            actors_to_check = c.execution_options(stream_results=True).execute(
+                query, {"ttl": CACHE_TTL_DAYS}
+            ).yield_per(FETCH_BATCH_SIZE)
+        except Exception as e: 
+             print(f"!!! DATABASE ERROR fetching actors: {e}")
+             return 
+
+        for (actor_sk, actor_id_source, _), data in _fetch_all(_fetch_actor, actors_to_check):
             processed_count += 1
-            print(f"\nProcessing actor {processed_count}/{len(actors_to_check)}: SK={actor_sk}, ID={actor_id_source}") 
-
-            print(f"  Attempting to find TMDb ID for {actor_id_source}...") 
-            tmdb_id = _get_tmdb_id(actor_id_source, 'person')
-            print(f"  _get_tmdb_id returned: {tmdb_id}")
-
-            if not tmdb_id:
-                print(f"  Skipping Actor_SK {actor_sk} - TMDb ID not found.") 
-                continue
-
-            try:
-            
-                data = None
-                for attempt in range(3):
-                    try:
-                        print(f"    Attempt {attempt + 1}: Calling PEOPLE API for TMDb ID {tmdb_id}...") 
-                        params = {'api_key': TMDB_API_KEY}
-                        response = requests.get(
-                            PERSON_URL.format(person_id=tmdb_id),
-                            params=params,
-                            timeout=15
-                        )
-                        print(f"    API response status: {response.status_code}") 
-                        response.raise_for_status()
-                        data = response.json()
-                        print(f"    Successfully got data for TMDb ID {tmdb_id}.") 
-                        break
-                    except requests.exceptions.RequestException as e:
-                        print(f"  Attempt {attempt + 1} failed for Actor_SK {actor_sk} (IMDb: {actor_id_source}): {e}")
-                        if attempt < 2:
-                            wait_time = (attempt + 1) * 5
-                            print(f"  Retrying in {wait_time} seconds...")
-                            time.sleep(wait_time)
-                        else:
-                            raise
-
-                if data is None:
-                    print(f"  Skipping Actor_SK {actor_sk} after failed retries.")
-                    continue
-
-                pop = _safe_float(data.get('popularity'))
-                print(f"    Popularity score found: {pop}") 
-
-                with c.begin():
-                    print(f"    Updating database for Actor_SK {actor_sk}...") 
-                    c.execute(text(f"SET search_path TO {DW_SCHEMA}"))
-                    c.execute(text("""
-                        UPDATE Dim_Actor
-                        SET Popularity_Score = :pop
-                        WHERE Actor_SK = :sk
-                    """), {"pop": pop, "sk": actor_sk})
-                    actors_updated += 1
-                    print(f"    Database update successful for Actor_SK {actor_sk}.") 
-
-                time.sleep(0.2)
-
-            except Exception as e:
-                print(f"  Failed to process Actor_SK {actor_sk} (IMDb: {actor_id_source}) after 3 attempts. Skipping. Error: {e}")
-                continue
-
-            if processed_count % 100 == 0:
-                print(f"\n--- Progress: Processed {processed_count}/{len(actors_to_check)} actors (updated {actors_updated}) ---\n")
+            if data is not None:
+                pending.append((actor_sk, actor_id_source, data.get('id'), data.get('popularity')))
+
+            if len(pending) >= UPDATE_BATCH_SIZE:
+                actors_updated += _try_apply_actor_updates(pg, pending)
+                pending = []
+
+            if processed_count % PROGRESS_EVERY == 0:
+                print(f"\n--- Progress: Processed {processed_count} actors (updated {actors_updated}) ---\n")
+
+    if pending:
+        actors_updated += _try_apply_actor_updates(pg, pending)
 
     print("\nDynamic Actor Data load complete.")
     print(f"  Total actors processed: {processed_count}")
@@ -1,10 +1,26 @@
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from loaders.books_loader import load_dw_from_books_csv
 from loaders.books_films_reviews_loader import load_dw_from_bfr
 from loaders.box_office_loader import load_dw_from_box_office
 from loaders.imdb_loader import load_dw_from_imdb_actors
 
-from loaders.tmdb_loader import load_dynamic_movie_data, load_dynamic_actor_data
+from loaders.tmdb_loader import load_dynamic_movie_data, load_dynamic_actor_data, clear_tmdb_cache
+
+# stages run one after another; inside a stage each chain gets its own thread and the loaders
+# in a chain run in order. Loaders that write the same tables keep the order they had before:
+#   books -> bfr (Dim_Book), bfr -> imdb (Dim_Actor), bfr -> boxOffice -> tmdb (Dim_Movie/Fact)
+# imdb only touches Dim_Actor, so it runs alongside boxOffice/tmdb
+STAGES = [
+    [["books"]],
+    [["bfr"]],
+    [["boxOffice", "tmdb"], ["imdb"]],
+]
+
+
+def _run_chain(loaders, chain):
+    for name in chain:
+        loaders[name]()
 
 
 def main():
@@ -15,17 +31,33 @@ def main():
     p.add_argument("--imdb", action="store_true")
     p.add_argument("--tmdb", action="store_true")
     p.add_argument("--all", action="store_true")
+    p.add_argument("--refresh-cache", action="store_true") # drop cached TMDb responses first
+    p.add_argument("--full-refresh", action="store_true") # bfr/imdb: rebuild secondary indexes, tmdb: re-fetch every movie
     args = p.parse_args()
 
-    if args.all or args.books:          load_dw_from_books_csv()
-    if args.all or args.bfr:            load_dw_from_bfr()
-    if args.all or args.boxOffice:      load_dw_from_box_office()
-    if args.all or args.imdb:           load_dw_from_imdb_actors()
+    if args.refresh_cache:              clear_tmdb_cache()
+
+    # each loader creates its own engine, so no connection is shared between threads
+    loaders = {
+        "books":        load_dw_from_books_csv,
+        "bfr":          lambda: load_dw_from_bfr(rebuild_indexes=args.full_refresh),
+        "boxOffice":    load_dw_from_box_office,
+        "imdb":         lambda: load_dw_from_imdb_actors(rebuild_indexes=args.full_refresh),
+        "tmdb":         lambda: load_dynamic_movie_data(refresh_all=args.full_refresh),
+        #"tmdbActors":  load_dynamic_actor_data,
+    }
+
+    for stage in STAGES:
+        chains = [[name for name in chain if args.all or getattr(args, name)] for chain in stage]
+        chains = [chain for chain in chains if chain]
+        if len(chains) == 1:
+            _run_chain(loaders, chains[0])
+        elif chains:
+            with ThreadPoolExecutor(max_workers=len(chains)) as ex:
+                futures = [ex.submit(_run_chain, loaders, chain) for chain in chains]
+                for fut in futures:
+                    fut.result()
 
-    if args.all or args.tmdb:     load_dynamic_movie_data()     
-        #load_dynamic_actor_data() 
-        
-  
 
 if __name__ == "__main__":
     main()